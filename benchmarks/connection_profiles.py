@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the connection profiles (DEFAULT_PROFILE vs READ_PROFILE) on
+simulated slow storage. A synthetic diff is generated, then for each profile:
+
+* the match tables are entirely loaded (in-memory backend)
+* random basic block lookups are answered by the 'sqlite' backend
+
+Every run starts with a cold page cache: the pages of the diff are evicted with
+``posix_fadvise(POSIX_FADV_DONTNEED)``, thus the file is actually read from the
+storage. Slow storage (e.g: network filesystem) is then simulated by charging a
+fixed latency to every I/O request issued (read syscalls and major page faults)
+and a bandwidth to the bytes read from the storage (taken from /proc/self/io and
+getrusage). To measure real slow storage instead, give a directory located on it
+(the latency can then be set to 0 and the bandwidth to a large value).
+
+Linux only.
+
+Usage: python benchmarks/connection_profiles.py [latency in ms] [bandwidth in MiB/s] [functions] [directory]
+"""
+
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from bindiff import BindiffFile
+from bindiff.connection import DEFAULT_PROFILE, READ_PROFILE
+
+BASIC_BLOCKS = 50  # per function
+LOOKUPS = 10000
+
+# READ_PROFILE is also run without in-memory load (as for diffs larger than its threshold)
+PROFILES = [
+    ("DEFAULT_PROFILE", DEFAULT_PROFILE),
+    ("READ_PROFILE", READ_PROFILE),
+    ("READ_PROFILE mmap", replace(READ_PROFILE, in_memory_threshold=0)),
+]
+
+
+def generate(file: Path, nb_functions: int) -> list[int]:
+    """
+    Generate a synthetic diff, with its lookup indexes
+
+    :return: primary addresses of the basic blocks
+    """
+    diff = BindiffFile.create(str(file), "synthetic", "", 1.0, 1.0, bulk=True)
+    diff.add_file_matched("primary", "00", functions=nb_functions)
+    diff.add_file_matched("secondary", "00", functions=nb_functions)
+    funs = [(0x400000 + i * 0x10000, 0x800000 + i * 0x10000) for i in range(nb_functions)]
+    fun_ids = diff.add_function_matches(
+        (a1, a2, f"f{i}", f"f{i}", 1.0) for i, (a1, a2) in enumerate(funs)
+    )
+    bbs = [
+        (fun_id, a1 + j * 0x40, a2 + j * 0x40)
+        for fun_id, (a1, a2) in zip(fun_ids, funs)
+        for j in range(BASIC_BLOCKS)
+    ]
+    bb_ids = diff.add_basic_block_matches(bbs)
+    diff.add_instruction_matches((bb_id, a1, a2) for bb_id, (_, a1, a2) in zip(bb_ids, bbs))
+    diff.commit()
+    diff.close()
+    BindiffFile(str(file), backend="sqlite", create_indexes=True).db.close()
+    return [x[1] for x in bbs]
+
+
+def evict(file: Path) -> None:
+    """
+    Drop the pages of a file from the page cache
+    """
+    fd = os.open(file, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def io_counters() -> tuple[int, int]:
+    """
+    I/O issued so far by the process
+
+    :return: number of requests (read syscalls and major page faults), bytes read from the storage
+    """
+    with open("/proc/self/io") as f:
+        counters = dict(x.split(": ") for x in f.read().splitlines())
+    requests = int(counters["syscr"]) + resource.getrusage(resource.RUSAGE_SELF).ru_majflt
+    return requests, int(counters["read_bytes"])
+
+
+def measure(file: Path, run, latency: float, bandwidth: float) -> tuple[float, int, int, float]:
+    """
+    Run a scenario with a cold page cache
+
+    :return: measured time (s), number of I/O requests, bytes read, time on the simulated storage (s)
+    """
+    evict(file)
+    requests, read = io_counters()
+    start = time.perf_counter()
+    run()
+    duration = time.perf_counter() - start
+    after = io_counters()
+    requests, read = after[0] - requests - 1, after[1] - read  # reading /proc/self/io is a syscall
+    return duration, requests, read, duration + requests * latency + read / bandwidth
+
+
+def full_load(file: Path, profile) -> None:
+    diff = BindiffFile(str(file), profile=profile)
+    diff.db.close()
+
+
+def lookups(file: Path, profile, addrs: list[int]) -> None:
+    diff = BindiffFile(str(file), backend="sqlite", profile=profile)
+    for addr in addrs:
+        diff.primary_basicblock_match.get(addr)
+    diff.db.close()
+
+
+def main(latency: float, bandwidth: float, nb_functions: int, directory: str | None) -> None:
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        file = Path(tmp) / "synthetic.BinDiff"
+        addrs = random.Random(0).sample(generate(file, nb_functions), LOOKUPS)
+        size = file.stat().st_size
+        print(
+            f"{nb_functions * BASIC_BLOCKS} basic block matches, {size / (1 << 20):.1f} MiB, "
+            f"simulated storage: {latency * 1000}ms, {bandwidth / (1 << 20):.0f} MiB/s"
+        )
+
+        scenarios = [
+            ("full load", lambda p: full_load(file, p)),
+            (f"{LOOKUPS} lookups", lambda p: lookups(file, p, addrs)),
+        ]
+        for scenario, run in scenarios:
+            for name, profile in PROFILES:
+                run(profile)  # warm-up (imports, lazy initializations)
+                duration, requests, read, total = measure(
+                    file, lambda: run(profile), latency, bandwidth
+                )
+                print(
+                    f"{scenario:>14} {name:>17}: {duration:6.2f}s cold, {requests:7} I/O requests, "
+                    f"{read / (1 << 20):6.1f} MiB read, {total:7.2f}s on slow storage"
+                )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        float(args[0]) / 1000 if len(args) > 0 else 0.5 / 1000,
+        float(args[1]) * (1 << 20) if len(args) > 1 else 100 << 20,
+        int(args[2]) if len(args) > 2 else 20000,
+        args[3] if len(args) > 3 else None,
+    )
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the function match lookups of BinDiff. Two synthetic programs
+(functions at the same addresses in both) and a diff matching most of their
+functions are generated, then every function of both programs is looked up:
+
+* with the former implementation of get_match and is_matched (side resolved
+  by comparing the function with ``==`` to the one at the same address)
+* with get_match, is_matched, get_matches and match_of_primary/secondary
+
+Usage: python benchmarks/function_lookups.py [functions] [repeat]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from binexport import ProgramBinExport
+from binexport.binexport2_pb2 import BinExport2
+
+from bindiff import BinDiff, BindiffFile
+
+MATCHED_RATIO = 0.9
+
+
+def generate_program(file: Path, nb_functions: int) -> None:
+    """
+    Generate a BinExport file of functions made of a single instruction
+    """
+    pb = BinExport2()
+    pb.meta_information.executable_name = file.stem
+    pb.meta_information.architecture_name = "x86-64"
+    pb.mnemonic.add().name = "ret"
+    for i in range(nb_functions):
+        addr = 0x400000 + i * 0x10
+        inst = pb.instruction.add()
+        inst.address, inst.raw_bytes, inst.mnemonic_index = addr, b"\xc3", 0
+        bb = pb.basic_block.add()
+        bb.instruction_index.add().begin_index = len(pb.instruction) - 1
+        flow_graph = pb.flow_graph.add()
+        flow_graph.basic_block_index.append(len(pb.basic_block) - 1)
+        flow_graph.entry_basic_block_index = len(pb.basic_block) - 1
+        vertex = pb.call_graph.vertex.add()
+        vertex.address, vertex.mangled_name = addr, f"f{i}"
+    file.write_bytes(pb.SerializeToString())
+
+
+def generate_diff(file: Path, nb_functions: int) -> None:
+    """
+    Generate a diff matching the first functions of the programs
+    """
+    diff = BindiffFile.create(str(file), "synthetic", "", 1.0, 1.0, bulk=True)
+    diff.add_file_matched("primary", "00", functions=nb_functions)
+    diff.add_file_matched("secondary", "00", functions=nb_functions)
+    addrs = [0x400000 + i * 0x10 for i in range(int(nb_functions * MATCHED_RATIO))]
+    diff.add_function_matches((addr, addr, f"f{i}", f"f{i}", 1.0) for i, addr in enumerate(addrs))
+    diff.commit()
+    diff.close()
+
+
+def legacy_get_match(diff: BinDiff, function):
+    """
+    get_match as implemented before the side-aware lookups
+    """
+    if diff.primary.get(function.addr) == function:
+        if match := diff.primary_functions_match.get(function.addr):
+            return diff.secondary[match.address2], match
+    elif diff.secondary.get(function.addr) == function:
+        if match := diff.secondary_functions_match.get(function.addr):
+            return diff.primary[match.address1], match
+    return None
+
+
+def legacy_is_matched(diff: BinDiff, function) -> bool:
+    """
+    is_matched as implemented before the side-aware lookups
+    """
+    return legacy_get_match(diff, function) is not None
+
+
+def bench(name: str, run, repeat: int, lookups: int) -> None:
+    """
+    Report the best time of ``repeat`` runs (the garbage collector is paused, as with timeit)
+    """
+    durations = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    best = min(durations)
+    print(f"{name:>20}: {best * 1000:7.2f}ms ({best / lookups * 1e9:5.0f} ns/lookup)")
+
+
+def main(nb_functions: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        p1, p2 = tmp / "primary.BinExport", tmp / "secondary.BinExport"
+        diff_file = tmp / "diff.BinDiff"
+        generate_program(p1, nb_functions)
+        generate_program(p2, nb_functions)
+        generate_diff(diff_file, nb_functions)
+        diff = BinDiff(ProgramBinExport(p1), ProgramBinExport(p2), diff_file)
+
+    functions = list(diff.primary.values()) + list(diff.secondary.values())
+    addrs = list(diff.primary)
+    assert [legacy_get_match(diff, f) for f in functions] == diff.get_matches(functions)
+    print(f"{len(functions)} functions ({MATCHED_RATIO:.0%} matched), best of {repeat} runs")
+
+    n = len(functions)
+    bench("get_match (former)", lambda: [legacy_get_match(diff, f) for f in functions], repeat, n)
+    bench("get_match", lambda: [diff.get_match(f) for f in functions], repeat, n)
+    bench("get_matches", lambda: diff.get_matches(functions), repeat, n)
+    bench("is_matched (former)", lambda: [legacy_is_matched(diff, f) for f in functions], repeat, n)
+    bench("is_matched", lambda: [diff.is_matched(f) for f in functions], repeat, n)
+    n = len(addrs)
+    bench("match_of_primary", lambda: [diff.match_of_primary(a) for a in addrs], repeat, n)
+    bench("match_of_secondary", lambda: [diff.match_of_secondary(a) for a in addrs], repeat, n)
+
+
+if __name__ == "__main__":
+    args = [int(x) for x in sys.argv[1:3]]
+    main(*(args + [10000, 20][len(args) :]))
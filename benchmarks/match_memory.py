@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark of the match tables loaded by BindiffFile. A synthetic diff
+(1M basic block matches by default) is generated, then loaded twice while
+tracing allocations:
+
+* with the former layout: plain dataclasses (with a per-instance ``__dict__``)
+  and nested ``dict[int, dict[int, ...]]`` basic block and instruction indexes
+* with BindiffFile (slotted records and :py:class:`MatchIndex`)
+
+The memory retained by the match tables and the load time are reported.
+
+Usage: python benchmarks/match_memory.py [functions] [basic blocks per function] [instructions per basic block]
+"""
+
+import gc
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+from bindiff import BindiffFile
+from bindiff.file import _i2u
+from bindiff.types import FunctionAlgorithm, BasicBlockAlgorithm
+
+
+@dataclass
+class LegacyFunctionMatch:
+    id: int
+    address1: int
+    name1: str
+    address2: int
+    name2: str
+    similarity: float
+    confidence: float
+    algorithm: FunctionAlgorithm
+
+
+@dataclass
+class LegacyBasicBlockMatch:
+    id: int
+    function_match: LegacyFunctionMatch
+    address1: int
+    address2: int
+    algorithm: BasicBlockAlgorithm
+
+
+def load_legacy(file: Path) -> tuple:
+    """
+    Load the match tables with the layout used before slotted records and MatchIndex
+    """
+    db = sqlite3.connect(f"file:{file}?mode=ro", uri=True)
+    functions, primary_fun, secondary_fun = {}, {}, {}
+    query = "SELECT id, address1, name1, address2, name2, similarity, confidence, algorithm FROM function"
+    for id, addr1, name1, addr2, name2, sim, conf, alg in db.execute(query):
+        addr1, addr2 = _i2u(addr1), _i2u(addr2)
+        m = LegacyFunctionMatch(id, addr1, name1, addr2, name2, sim, conf, FunctionAlgorithm(alg))
+        functions[id] = primary_fun[addr1] = secondary_fun[addr2] = m
+
+    bbs, primary_bb, secondary_bb = {}, {}, {}
+    query = "SELECT id, functionid, address1, address2, algorithm FROM basicblock"
+    for id, fun_id, addr1, addr2, alg in db.execute(query):
+        fun = functions[fun_id]
+        m = LegacyBasicBlockMatch(id, fun, _i2u(addr1), _i2u(addr2), BasicBlockAlgorithm(alg))
+        bbs[id] = m
+        primary_bb.setdefault(m.address1, {})[fun.address1] = m
+        secondary_bb.setdefault(m.address2, {})[fun.address2] = m
+
+    primary_inst, secondary_inst = {}, {}
+    query = "SELECT basicblockid, address1, address2 FROM instruction"
+    for bb_id, addr1, addr2 in db.execute(query):
+        fun = bbs[bb_id].function_match
+        addr1, addr2 = _i2u(addr1), _i2u(addr2)
+        primary_inst.setdefault(addr1, {})[fun.address1] = addr2
+        secondary_inst.setdefault(addr2, {})[fun.address2] = addr1
+    db.close()
+    del functions, bbs
+    return primary_fun, secondary_fun, primary_bb, secondary_bb, primary_inst, secondary_inst
+
+
+def generate(file: Path, nb_functions: int, nb_bbs: int, nb_insts: int) -> None:
+    """
+    Generate a synthetic diff: every function, basic block and instruction is matched
+    """
+    diff = BindiffFile.create(str(file), "synthetic", "", 1.0, 1.0, bulk=True)
+    diff.add_file_matched("primary", "00", functions=nb_functions)
+    diff.add_file_matched("secondary", "00", functions=nb_functions)
+    funs = [(0x400000 + i * 0x10000, 0x800000 + i * 0x10000) for i in range(nb_functions)]
+    fun_ids = diff.add_function_matches(
+        (a1, a2, f"f{i}", f"f{i}", 1.0) for i, (a1, a2) in enumerate(funs)
+    )
+    bbs = [
+        (fun_id, a1 + j * 0x40, a2 + j * 0x40)
+        for fun_id, (a1, a2) in zip(fun_ids, funs)
+        for j in range(nb_bbs)
+    ]
+    bb_ids = diff.add_basic_block_matches(bbs)
+    diff.add_instruction_matches(
+        (bb_id, a1 + k * 4, a2 + k * 4)
+        for bb_id, (_, a1, a2) in zip(bb_ids, bbs)
+        for k in range(nb_insts)
+    )
+    diff.commit()
+    diff.close()
+
+
+def measure(name: str, load) -> float:
+    """
+    Report the memory retained by the object returned by ``load``
+
+    :return: retained memory in MiB
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tables = load()
+    duration = time.perf_counter() - start
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] / (1 << 20)
+    tracemalloc.stop()
+    del tables
+    print(f"{name:>12}: {retained:8.1f} MiB retained, loaded in {duration:.1f}s")
+    return retained
+
+
+def main(nb_functions: int, nb_bbs: int, nb_insts: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        file = Path(tmp) / "synthetic.BinDiff"
+        generate(file, nb_functions, nb_bbs, nb_insts)
+        total = nb_functions * nb_bbs
+        print(
+            f"{nb_functions} function, {total} basic block and {total * nb_insts} instruction matches"
+        )
+
+        legacy = measure("dicts", lambda: load_legacy(file))
+        current = measure("BindiffFile", lambda: BindiffFile(str(file)))
+        print(f"reduction: {100 * (1 - current / legacy):.0f}%")
+
+
+if __name__ == "__main__":
+    args = [int(x) for x in sys.argv[1:4]]
+    main(*(args + [20000, 50, 1][len(args) :]))
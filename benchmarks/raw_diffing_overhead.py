@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the fixed overhead of BinDiff.raw_diffing (installation
+lookup, temporary directory, moving the diff, filename fix-up). The differ is
+replaced by a stub shell script copying a template diff, and the runtime of
+the stub alone is subtracted from the results (POSIX only).
+
+Usage: python benchmarks/raw_diffing_overhead.py [number of diffs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+STUB = """#!/bin/sh
+for arg in "$@"; do
+    case $arg in
+        --primary=*) primary=$(basename "${arg#--primary=}" .BinExport);;
+        --secondary=*) secondary=$(basename "${arg#--secondary=}" .BinExport);;
+        --output_dir=*) output=${arg#--output_dir=};;
+    esac
+done
+cp "%s" "$output/${primary}_vs_${secondary}.BinDiff"
+"""
+
+
+def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        bin_dir, exports, diffs = tmp / "bin", tmp / "exports", tmp / "diffs"
+        for d in [bin_dir, exports, diffs]:
+            d.mkdir()
+
+        # Template diff returned by the stub differ
+        from bindiff import BindiffFile
+
+        template = tmp / "template.BinDiff"
+        diff = BindiffFile.create(str(template), "stub", "", 1.0, 1.0)
+        diff.add_file_matched("primary", "00")
+        diff.add_file_matched("secondary", "00")
+        diff.commit()
+        diff.close()
+
+        stub = bin_dir / "bindiff"
+        stub.write_text(STUB % template)
+        stub.chmod(0o755)
+        os.environ["BINDIFF_PATH"] = str(bin_dir)
+
+        p1, p2 = exports / "primary.BinExport", exports / "secondary.BinExport"
+        p1.write_bytes(b"")
+        p2.write_bytes(b"")
+
+        from bindiff import BinDiff
+
+        # Runs of the differ alone and of raw_diffing are interleaved to share the same
+        # system noise, the overhead is the median of the differences
+        out_dir = tmp / "stub-out"
+        out_dir.mkdir()
+        cmd = [str(stub), f"--primary={p1}", f"--secondary={p2}", f"--output_dir={out_dir}"]
+        stub_times, diff_times = [], []
+        for i in range(count):
+            start = time.perf_counter()
+            subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            stub_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            assert BinDiff.raw_diffing(p1, p2, diffs / f"{i}.BinDiff")
+            diff_times.append(time.perf_counter() - start)
+
+        overhead = statistics.median(d - s for d, s in zip(diff_times, stub_times))
+        print(f"{count} diffs: {sum(diff_times):.3f}s (stub differ alone: {sum(stub_times):.3f}s)")
+        print(f"median overhead per diff: {overhead * 1000:.2f}ms")
+        leftovers = [x.name for x in diffs.iterdir() if not x.name.endswith(".BinDiff")]
+        assert not leftovers, f"temporary files left: {leftovers}"
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
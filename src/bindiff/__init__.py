@@ -1,3 +1,7 @@
-from bindiff.file import BindiffFile
+from bindiff.file import BindiffFile, LoadFilter
 from bindiff.bindiff import BinDiff
 from bindiff.workspace import BindiffWorkspace
+from bindiff.cache import DiffCache, DiffResultCache, BinExportStore
+from bindiff.batch import DiffJob, DiffResult
+from bindiff.prematch import prematch, PrematchResult
+from bindiff.journal import DiffJournal
@@ -3,18 +3,16 @@
 
 import logging
 import os
-import traceback
+from functools import partial
 from pathlib import Path
-import queue
 from typing import Generator
 import magic
 import click
 import sys
 
-from multiprocessing import Pool, Queue, Manager
-
-from bindiff import BinDiff, BindiffWorkspace
-from binexport import ProgramBinExport, DisassemblerBackend, check_disassembler_availability
+from bindiff import BinDiff, BindiffWorkspace, DiffJob, BinExportStore, DiffJournal
+from bindiff.batch import estimate_size, sort_by_cost, program_name
+from binexport import DisassemblerBackend, check_disassembler_availability
 
 
 BINARY_FORMAT = {
@@ -79,59 +77,31 @@ def iter_directories(p1: Path, p2: Path) -> Generator[tuple[Path, Path], None, N
             pass  # Ignore symlinks & co
 
 
-def diffing_job(ingress, egress, output: Path|None, single: bool, backend: DisassemblerBackend, timeout: int | None) -> None:
-    while True:
-        try:
-            primary, secondary = ingress.get(timeout=0.5)
-
-            # Compute destination diff file
-            if output is None:
-                diff_output = f"{primary.stem}_vs_{secondary.stem}.BinDiff"
-            elif not single and output is not None:
-                # In Batch mode we need to create an additional directory to store the BinDiff into
-                # the reason is that BinDiff uses the parent directory to represent a diff in the UI.
-                diff_dir = output / primary.stem
-                diff_dir.mkdir(exist_ok=True)
-                diff_output = diff_dir / f"{primary.stem}_vs_{secondary.stem}.BinDiff"
-            elif single and output is not None:
-                diff_output = output
-
-                # Check that the output name is not too long
-                if len(str(diff_output)) > 255:
-                    logging.error("Output file name is too long (%s).", output)
-                    exit(1)
-            else:
-                assert False
-
-            # Export primary if needed
-            if primary.suffix != ".BinExport":
-                logging.info(f"export primary: {primary}.BinExport")
-                primary = ProgramBinExport.generate(primary.as_posix(), backend=backend, timeout=timeout)
-            
-            # Export secondary if needed
-            if secondary.suffix != ".BinExport":  # Export primary
-                logging.info(f"export secondary: {secondary}.BinExport")
-                secondary = ProgramBinExport.generate(secondary.as_posix(), backend=backend, timeout=timeout)
-            
-            # Diffing both binexports
-            logging.info("start diffing")
-            if BinDiff.raw_diffing(primary, secondary, diff_output):
-                logging.info(f"diffing file written to: {diff_output}")
-                res = True
-            else:
-                logging.error(f"Diffing failed")
-                res = False
+def make_job(primary: Path, secondary: Path, output: Path | None, single: bool) -> DiffJob:
+    """
+    Create the diff job of a pair of files, computing the destination diff file.
+    The destination is the same whether the programs are given as binaries or as
+    their .BinExport files (thus stable across runs, once binaries are exported).
+    """
+    name1, name2 = program_name(primary), program_name(secondary)
+    if output is None:
+        diff_output = Path(f"{name1}_vs_{name2}.BinDiff")
+    elif not single:
+        # In Batch mode we need to create an additional directory to store the BinDiff into
+        # the reason is that BinDiff uses the parent directory to represent a diff in the UI.
+        diff_dir = output / name1
+        diff_dir.mkdir(exist_ok=True)
+        diff_output = diff_dir / f"{name1}_vs_{name2}.BinDiff"
+    else:
+        diff_output = output
+    return DiffJob(primary, secondary, diff_output)
 
-            egress.put((diff_output, res))
-        except queue.Empty:
-            pass
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            # Might not be printed as triggered withing a fork
-            logging.error(traceback.format_exception(e))
-            egress.put((None, e))
 
+def _is_huge(threshold: int, job: DiffJob) -> bool:
+    """
+    Whether the inputs of a job are larger than the threshold (in bytes)
+    """
+    return estimate_size(job) > threshold
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
@@ -149,12 +119,16 @@ def diffing_job(ingress, egress, output: Path|None, single: bool, backend: Disas
     help="Path of the disassembler (dir or binary for IDA, dir for Ghidra)" \
     "(if not provided search $PATH or environment variable IDA_PATH, GHIDRA_PATH)",
 )
-@click.option("-t", "--threads", type=int, default=1, help="Thread number to use")
+@click.option("-t", "--threads", type=int, default=1, help="Number of parallel exports and diffs")
+@click.option("--export-workers", type=int, default=None,
+              help="Number of parallel exports (default: --threads)")
+@click.option("--diff-workers", type=int, default=None,
+              help="Number of parallel diffs (default: --threads)")
 @click.option(
     "--timeout",
     type=int,
     default=None,
-    help="Per-file export timeout in seconds (if not set, no timeout is enforced)",
+    help="Per-file export and diffing timeout in seconds (if not set, no timeout is enforced)",
 )
 @click.option(
     "-b",
@@ -168,6 +142,17 @@ def diffing_job(ingress, egress, output: Path|None, single: bool, backend: Disas
               default=None, help="Output BinDiff file, or directory for batch")
 @click.option("--override", is_flag=True, default=False,
               help="Override existing output files (includes .BinExport files)")
+@click.option("--binexport-store", type=str, is_flag=False, flag_value="", default=None,
+              help="Reuse the exports of identical binaries across pairs and runs, stored in the "
+                   "given directory (default: ~/.cache/python-bindiff/binexport)")
+@click.option("--journal", "journal_file", type=click.Path(path_type=Path), default=None,
+              help="Journal of the batch: a rerun skips the pairs already diffed and retries the others")
+@click.option("--input-order", is_flag=True, default=False,
+              help="Diff pairs in directory order (default: largest estimated cost first)")
+@click.option("--max-huge-jobs", type=int, default=None,
+              help="Maximum number of huge pairs diffed concurrently (default: no limit)")
+@click.option("--huge-size", type=int, default=512,
+              help="Size (MiB) of the inputs of a pair above which it is huge")
 @click.option("-bw", "--bindiff-workspace", type=click.Path(path_type=Path), default=None,
               help="Create a BinDiff Workspace database")
 @click.argument("primary", type=click.Path(exists=True, path_type=Path),
@@ -177,11 +162,18 @@ def diffing_job(ingress, egress, output: Path|None, single: bool, backend: Disas
 def main(disassembler: str,
          disass_path: str,
          threads: int,
+         export_workers: int | None,
+         diff_workers: int | None,
          timeout: int|None,
          bindiff_path: str,
          stop_on_error: bool,
          output: Path|None,
          override: bool,
+         binexport_store: str | None,
+         journal_file: Path | None,
+         input_order: bool,
+         max_huge_jobs: int | None,
+         huge_size: int,
          primary: Path,
          secondary: Path,
          bindiff_workspace: Path | None) -> None:
@@ -192,15 +184,22 @@ def main(disassembler: str,
 
     :param disassembler: Disassembler to use for BinExport generation
     :param disass_path: Path to the disassembler if it has to be provided
-    :param threads: Number of parrallel jobs for bulk directory diffing
+    :param threads: Number of parallel exports and diffs for bulk directory diffing
+    :param export_workers: Number of parallel exports (disassemblers), overrides threads
+    :param diff_workers: Number of parallel diffs, overrides threads
     :param timeout: Timeout per export or diffing task
     :param bindiff_path: Path to the BinDiff folder
     :param stop_on_error: whether stopping the whole diffing process if one fails
     :param output: Path for the output diffing file
-    :param override: Whether to override existing output files
+    :param override: Whether to override existing output files (also invalidates stored exports)
+    :param binexport_store: Directory of the BinExport store ("" for the default one), None to disable it
     :param primary: Path to the primary file or directory
     :param secondary: Path to the secondary file or directory
-    :param bindiff_workspace: Path to the BinDiff workspace database to create
+    :param journal_file: Path to the journal of the batch (SQLite database), to resume it
+    :param input_order: Whether to diff pairs in directory order rather than largest first
+    :param max_huge_jobs: Maximum number of huge pairs diffed concurrently
+    :param huge_size: Size in MiB of the inputs (BinExport files) of a huge pair
+    :param bindiff_workspace: Path to the BinDiff workspace database to create (updated as diffs complete)
     """
 
     logging.basicConfig(format="[%(levelname)s] %(message)s", level=logging.INFO)
@@ -223,24 +222,16 @@ def main(disassembler: str,
         sys.exit(1)
 
 
-    manager = Manager()
-    ingress = manager.Queue()
-    egress = manager.Queue()
-    pool = Pool(threads)
-
-
     # Single diff mode
     if primary.is_file() and secondary.is_file():
-        ingress.put((primary, secondary))
-        total = 1
-        single = True
+        # Check that the output name is not too long
+        if output is not None and len(str(output)) > 255:
+            logging.error("Output file name is too long (%s).", output)
+            sys.exit(1)
+        jobs = [make_job(primary, secondary, output, single=True)]
 
     # Batch diff mode
     elif primary.is_dir() and secondary.is_dir():
-        # Pre-fill ingress queue
-        total = 0
-        single = False
-
         # Make sure output is okay
         if output is not None:
             if output.exists():
@@ -251,53 +242,26 @@ def main(disassembler: str,
                 output.mkdir()
 
         # Iter primary directory to identify files to diff
-        for file1, file2 in iter_directories(primary, secondary):
-            ingress.put((file1, file2))
-            total += 1
+        jobs = [
+            make_job(file1, file2, output, single=False)
+            for file1, file2 in iter_directories(primary, secondary)
+        ]
     else:
         logging.error("primary and secondary should be of the same type (either file, or directory)")
         sys.exit(1)
 
-    # Launch all workers
-    for _ in range(threads):
-        pool.apply_async(diffing_job, (ingress, egress, output, single, engine, timeout))
-
-    logging.info(f"Start diffing {total} binar{'ies' if total > 1 else 'y'} with {engine.name} backend")
-
-
-    diffs_files = []
-    i = 0
-    while True:
-        item = egress.get()
-        i += 1
-        path, res = item
-
-        # Check if the result is an exception
-        if isinstance(res, Exception):
-            logging.error(f"Error while processing {path}: {res}")
-            if stop_on_error:
-                logging.error(traceback.format_exception(res))
-                pool.terminate()
-                break
-            else:
-                res = False # set to false and just print KO
-        
-        # Print the result
-        if res:
-            pp_res = Bcolors.OKGREEN + "OK" + Bcolors.ENDC
-            diffs_files.append(path)
-        else:
-            pp_res = Bcolors.FAIL + "KO" + Bcolors.ENDC
-        
-        # print stats
-        logging.info(f"[{i}/{total}] {str(path)} [{pp_res}]")
-        if i == total:
-            break
-
-    pool.terminate()
-
-    
-    # Create the BinDiff workspace
+    # Skip the pairs already diffed by a previous run (unless overriding)
+    journal = DiffJournal(journal_file) if journal_file else None
+    done_jobs = []
+    if journal is not None and not override:
+        done_jobs = [job for job in jobs if journal.is_done(job)]
+        if done_jobs:
+            done_outputs = {job.output for job in done_jobs}
+            jobs = [job for job in jobs if job.output not in done_outputs]
+            logging.info(f"{len(done_jobs)} diffs already done according to the journal, skipped")
+
+    # The BinDiff workspace is updated as diffs complete
+    workspace = None
     if bindiff_workspace:
         ws_file = Path(bindiff_workspace)
 
@@ -305,15 +269,69 @@ def main(disassembler: str,
         if ws_file.suffix != ".BinDiffWorkspace":
             ws_file = Path(str(ws_file)+".BinDiffWorkspace")
 
-        # Create workspace and add the diffs
         workspace = BindiffWorkspace(ws_file, permission="rw")
+        ws_diffs = {x.path.resolve() for x in workspace.diffs}
+
+        def add_to_workspace(diff_file: Path) -> None:
+            if diff_file.resolve() not in ws_diffs:
+                workspace.add_diff(Path(diff_file).absolute(), is_function_diff=False)
+                workspace.commit()
+                ws_diffs.add(diff_file.resolve())
+
+        for job in done_jobs:
+            add_to_workspace(job.output)
 
-        for diff_file in diffs_files:
-            workspace.add_diff(Path(diff_file).absolute(), is_function_diff=False)
-        
+    # Longest jobs first, so that a large pair starting late does not stretch the batch
+    if not input_order:
+        jobs = sort_by_cost(jobs, journal.durations() if journal is not None else None)
+
+    total = len(jobs)
+    logging.info(f"Start diffing {total} binar{'ies' if total > 1 else 'y'} with {engine.name} backend")
+
+    interrupted = False
+    # Exports and diffs run in two pools: a pair is diffed as soon as its two exports are done
+    store = BinExportStore(binexport_store or None) if binexport_store is not None else None
+    # fmt: off
+    results = BinDiff.diff_many(jobs, workers=threads, timeout=timeout, export_workers=export_workers,
+                                diff_workers=diff_workers, backend=engine, override=override,
+                                store=store, max_heavy=max_huge_jobs,
+                                heavy=partial(_is_huge, huge_size << 20) if max_huge_jobs else None)
+    # fmt: on
+    try:
+        for i, result in enumerate(results, start=1):
+            if result.error is not None:
+                logging.error(f"Error while processing {result.output}: {result.error}")
+            if journal is not None:
+                journal.record(result)
+
+            # Print the result
+            if result.success:
+                pp_res = Bcolors.OKGREEN + "OK" + Bcolors.ENDC
+                if workspace is not None:
+                    add_to_workspace(result.output)
+            else:
+                pp_res = Bcolors.FAIL + "KO" + Bcolors.ENDC
+
+            # print stats
+            logging.info(f"[{i}/{total}] {str(result.output)} [{pp_res}]")
+
+            if not result.success and stop_on_error:
+                logging.info("stop on error: waiting for the running jobs to finish")
+                results.close()  # drop the jobs not started, wait for the running ones
+                break
+    except KeyboardInterrupt:
+        # Running diffs have been completed (and reported) before the interruption is raised
+        logging.warning("Interrupted by user")
+        interrupted = True
+
+    if journal is not None:
+        journal.close()
+    if workspace is not None:
         workspace.close()
         logging.info(f"Bindiff workspace written at: {bindiff_workspace}")
 
+    if interrupted:
+        sys.exit(130)
 
 if __name__ == "__main__":
     main()
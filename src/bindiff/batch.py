@@ -0,0 +1,358 @@
+from pathlib import Path
+import logging
+import signal
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Mapping, Union
+
+from binexport import ProgramBinExport, DisassemblerBackend
+
+from bindiff.cache import DiffResultCache, BinExportStore
+
+
+def program_name(program: Path) -> str:
+    """
+    Name of a program, the same for a binary and its .BinExport file (e.g.
+    ``libx.so.1`` for both ``libx.so.1`` and ``libx.so.1.BinExport``), as used by
+    the differ to name its output.
+
+    :param program: binary or .BinExport file
+    :return: name of the program
+    """
+    return program.stem if program.suffix == ".BinExport" else program.name
+
+
+@dataclass
+class DiffJob:
+    """
+    A pair of programs to diff. Programs are either binaries (exported first)
+    or .BinExport files.
+    """
+
+    primary: Path  #: primary binary or .BinExport file
+    secondary: Path  #: secondary binary or .BinExport file
+    output: Path | None = None  #: output diff file (default: <primary>_vs_<secondary>.BinDiff)
+
+    def __post_init__(self):
+        self.primary, self.secondary = Path(self.primary), Path(self.secondary)
+        if self.output is None:
+            name1, name2 = program_name(self.primary), program_name(self.secondary)
+            self.output = Path(f"{name1}_vs_{name2}.BinDiff")
+        self.output = Path(self.output)
+
+
+@dataclass
+class DiffResult:
+    """
+    Outcome of a diff job
+    """
+
+    job: DiffJob  #: the job
+    success: bool  #: whether the diff file has been written
+    error: str | None = None  #: error message (with the traceback of the worker if any)
+    duration: float = 0.0  #: time spent on the job in workers (exports and diffing) in seconds
+
+    @property
+    def output(self) -> Path:
+        """
+        Path of the diff file
+        """
+        return self.job.output
+
+
+#: Rough ratio between the size of a .BinExport file and the size of its binary
+EXPORT_SIZE_RATIO = 4
+
+
+def estimate_size(job: DiffJob) -> int:
+    """
+    Estimate the size of the inputs of a job, which drives the duration and the
+    memory usage of the diff: the size of both .BinExport files (it follows the
+    number of functions, basic blocks and instructions), estimated from the size
+    of the binaries not exported yet.
+
+    :param job: diff job
+    :return: estimated size in bytes
+    """
+    size = 0
+    for program in [job.primary, job.secondary]:
+        export = program if program.suffix == ".BinExport" else Path(str(program) + ".BinExport")
+        if export.exists():
+            size += export.stat().st_size
+        elif program.exists():
+            size += EXPORT_SIZE_RATIO * program.stat().st_size
+    return size
+
+
+def sort_by_cost(
+    jobs: Iterable[Union[DiffJob, tuple]], durations: Mapping[Path, float] | None = None
+) -> list[DiffJob]:
+    """
+    Sort jobs by decreasing estimated cost (longest processing time first), so
+    that the largest pairs do not start last and stretch the total duration. The
+    cost of a job is its duration in a previous successful run if known (e.g.
+    from a :py:class:`DiffJournal`), otherwise it is estimated from the size of
+    its inputs, converted to a duration with the median rate of the known jobs.
+
+    :param jobs: jobs, or tuples (primary, secondary[, output])
+    :param durations: known durations in seconds, by (resolved) output path
+    :return: the sorted jobs
+    """
+    jobs = [x if isinstance(x, DiffJob) else DiffJob(*x) for x in jobs]
+    durations = durations or {}
+    sizes = {job.output.resolve(): estimate_size(job) for job in jobs}
+    rates = sorted(
+        durations[out] / size for out, size in sizes.items() if out in durations and size
+    )
+    rate = rates[len(rates) // 2] if rates else 1.0
+
+    def cost(job: DiffJob) -> float:
+        out = job.output.resolve()
+        return durations.get(out, sizes[out] * rate)
+
+    return sorted(jobs, key=cost, reverse=True)
+
+
+def _call(func: Callable, *args) -> tuple[Any, str | None, float]:
+    """
+    Run a function in a worker. Exceptions are turned into their traceback so
+    that the result can always be sent back to the parent process.
+
+    :return: the result, the error (or None) and the duration of the call
+    """
+    start = time.perf_counter()
+    try:
+        return func(*args), None, time.perf_counter() - start
+    except Exception:
+        return None, traceback.format_exc(), time.perf_counter() - start
+
+
+def _ignore_sigint() -> None:
+    """
+    Initializer of the workers. Ctrl-C is only handled by the parent process, thus
+    running exports and diffs (and the processes they spawn) are not killed by it.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _export(
+    binary: Path,
+    backend: DisassemblerBackend,
+    timeout: int | None,
+    override: bool,
+    store: BinExportStore | None,
+) -> Path:
+    """
+    Export a binary (next to it) with the given disassembler, through the store if any
+
+    :return: path of the .BinExport file
+    """
+    logging.info(f"export: {binary}.BinExport")
+    if store is not None:
+        return store.export(binary, backend, timeout, override)
+    return ProgramBinExport.generate(binary, override=override, backend=backend, timeout=timeout)
+
+
+def _diff(
+    primary: Path, secondary: Path, output: Path, timeout: int | None, cache: DiffResultCache | None
+) -> bool:
+    """
+    Diff two .BinExport files
+    """
+    from bindiff.bindiff import BinDiff
+
+    logging.info(f"start diffing: {output}")
+    return BinDiff.raw_diffing(primary, secondary, output, cache, timeout)
+
+
+class _PendingJob(object):
+    """
+    Job waiting for the exports of its programs
+    """
+
+    def __init__(self, job: DiffJob):
+        self.job = job
+        # replaced by the .BinExport files once exported
+        self.programs = [job.primary, job.secondary]
+        self.missing = 0  # number of exports not done yet
+        self.error: str | None = None
+        self.duration = 0.0
+        self.heavy = False
+
+    def exported(self, side: int, result: tuple[Path | None, str | None, float]) -> None:
+        path, error, duration = result
+        self.missing -= 1
+        self.duration += duration
+        if error is not None:
+            self.error = self.error or error
+        else:
+            self.programs[side] = path
+
+
+def diff_many(
+    pairs: Iterable[Union[DiffJob, tuple]],
+    export_workers: int = 1,
+    diff_workers: int = 1,
+    backend: DisassemblerBackend = DisassemblerBackend.IDA,
+    timeout: int | None = None,
+    override: bool = False,
+    cache: DiffResultCache | None = None,
+    max_pending: int | None = None,
+    store: BinExportStore | None = None,
+    heavy: Callable[[DiffJob], bool] | None = None,
+    max_heavy: int | None = None,
+) -> Iterator[DiffResult]:
+    """
+    Diff many pairs of programs in worker processes. Exports and diffs run in two
+    distinct process pools, thus the number of disassemblers (limited by licenses
+    and memory) and the number of differs (CPU-bound) are set independently. Both
+    programs of a pair are exported concurrently, and a binary appearing in several
+    pairs is only exported once. A pair is diffed as soon as its two exports are done.
+
+    Pairs are read lazily, in order: at most ``max_pending`` jobs are in flight (read
+    and not yielded yet), and work is only handed to idle workers. Pairs can be
+    sorted beforehand with :py:func:`sort_by_cost`. The number of heavy diffs running
+    concurrently can be capped, a heavy diff then waits while lighter ones run.
+
+    Results are yielded as they complete. A failing pair does not stop the others.
+    Closing the iterator early drops the jobs not started yet and waits for the
+    running ones. On Ctrl-C (ignored by workers) no new export or diff is started,
+    the results of the running diffs are still yielded and KeyboardInterrupt is
+    raised at the end.
+
+    :param pairs: jobs, or tuples (primary, secondary[, output])
+    :param export_workers: number of concurrent exports
+    :param diff_workers: number of concurrent diffs
+    :param backend: disassembler used to export binaries
+    :param timeout: timeout of each export and each diff in seconds (no limit if None)
+    :param override: override existing .BinExport files
+    :param cache: cache of diff results (see :py:class:`DiffResultCache`)
+    :param max_pending: maximum number of jobs in flight (default: twice the number of workers)
+    :param store: store of BinExport files, binaries are exported only once across pairs and runs
+                  (see :py:class:`BinExportStore`)
+    :param heavy: predicate of the jobs whose diff is heavy (e.g: in memory)
+    :param max_heavy: maximum number of heavy diffs running concurrently (no limit if None)
+    :return: iterator of the results (in completion order)
+    """
+    if max_pending is None:
+        max_pending = 2 * (export_workers + diff_workers)
+    assert max_pending > 0
+    assert max_heavy is None or max_heavy > 0
+    exporter = ProcessPoolExecutor(max_workers=export_workers, initializer=_ignore_sigint)
+    differ = ProcessPoolExecutor(max_workers=diff_workers, initializer=_ignore_sigint)
+    try:
+        # binary -> export (None while queued), shared by all the jobs
+        exports: dict[Path, Future | None] = {}
+        export_queue: deque[Path] = deque()
+        exporting: dict[Future, Path] = {}  # running exports
+        # binary -> jobs (and side) waiting for it
+        waiting: dict[Path, list[tuple[_PendingJob, int]]] = {}
+        diff_queue: deque[_PendingJob] = deque()  # jobs whose programs are exported
+        running: dict[Future, _PendingJob] = {}  # running diffs
+
+        def exported(pending: _PendingJob, side: int, result: tuple) -> DiffResult | None:
+            pending.exported(side, result)
+            if pending.missing:
+                return None
+            if pending.error is not None:
+                return DiffResult(pending.job, False, pending.error, pending.duration)
+            diff_queue.append(pending)
+            return None
+
+        def start(job: Union[DiffJob, tuple]) -> DiffResult | None:
+            job = job if isinstance(job, DiffJob) else DiffJob(*job)
+            pending = _PendingJob(job)
+            pending.heavy = heavy is not None and heavy(job)
+            done = []
+            for side, program in enumerate(pending.programs):
+                if program.suffix == ".BinExport":
+                    continue
+                pending.missing += 1
+                if program not in exports:
+                    exports[program] = None
+                    export_queue.append(program)
+                if (future := exports[program]) is not None and future.done():
+                    done.append((side, future.result()))
+                else:
+                    waiting.setdefault(program, []).append((pending, side))
+            if not pending.missing:
+                diff_queue.append(pending)
+            result = None
+            for side, export in done:
+                result = exported(pending, side, export)
+            return result
+
+        def dispatch() -> None:
+            # Work is not queued in the executors, thus it can still be dropped on interruption
+            while export_queue and len(exporting) < export_workers:
+                binary = export_queue.popleft()
+                future = exporter.submit(_call, _export, binary, backend, timeout, override, store)
+                exports[binary] = future
+                exporting[future] = binary
+            while diff_queue and len(running) < diff_workers:
+                if max_heavy is not None and sum(x.heavy for x in running.values()) >= max_heavy:
+                    pending = next((x for x in diff_queue if not x.heavy), None)
+                    if pending is None:
+                        break
+                    diff_queue.remove(pending)
+                else:
+                    pending = diff_queue.popleft()
+                future = differ.submit(
+                    _call, _diff, *pending.programs, pending.job.output, timeout, cache
+                )
+                running[future] = pending
+
+        jobs = iter(pairs)
+        in_flight = 0  # jobs read whose result is not yielded yet
+        interrupted = False
+        while True:
+            while (
+                not interrupted
+                and in_flight < max_pending
+                and (job := next(jobs, None)) is not None
+            ):
+                in_flight += 1
+                if (result := start(job)) is not None:
+                    in_flight -= 1
+                    yield result
+            if not interrupted:
+                dispatch()
+            if not exporting and not running:
+                break
+
+            try:
+                done, _ = wait(list(exporting) + list(running), return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                if interrupted:
+                    raise
+                interrupted = True
+                export_queue.clear()
+                diff_queue.clear()
+                waiting.clear()
+                logging.warning(
+                    f"interrupted: waiting for {len(exporting)} exports and {len(running)} diffs to finish"
+                )
+                continue
+
+            for future in done:
+                if (pending := running.pop(future, None)) is not None:
+                    success, error, duration = future.result()
+                    if error is None and not success:
+                        error = "diffing failed"
+                    in_flight -= 1
+                    yield DiffResult(pending.job, bool(success), error, pending.duration + duration)
+                    continue
+
+                binary = exporting.pop(future)
+                for pending, side in waiting.pop(binary, []):
+                    if (result := exported(pending, side, future.result())) is not None:
+                        in_flight -= 1
+                        yield result
+        if interrupted:
+            raise KeyboardInterrupt
+    finally:
+        exporter.shutdown(wait=True, cancel_futures=True)
+        differ.shutdown(wait=True, cancel_futures=True)
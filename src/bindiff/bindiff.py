@@ -1,17 +1,26 @@
 from __future__ import absolute_import
+import asyncio
 import logging
 import shutil
 import os
+import signal
+import sqlite3
 import subprocess
 import tempfile
 from pathlib import Path
 from turtle import st
-from typing import Union, Optional
+from typing import Union, Optional, Callable, Iterable, Iterator, AbstractSet, TYPE_CHECKING
 
 from binexport import ProgramBinExport, FunctionBinExport, BasicBlockBinExport, InstructionBinExport
+from binexport import DisassemblerBackend
 
 from bindiff.types import BindiffNotFound
-from bindiff.file import BindiffFile, FunctionMatch, BasicBlockMatch
+from bindiff.cache import DiffCache, DiffResultCache, BinExportStore
+from bindiff.connection import ConnectionProfile
+from bindiff.file import BindiffFile, FunctionMatch, BasicBlockMatch, LoadFilter, _i2u
+
+if TYPE_CHECKING:
+    from bindiff.batch import DiffJob, DiffResult
 
 
 BINDIFF_BINARY = None
@@ -68,6 +77,35 @@ def _check_path() -> bool:
     return False
 
 
+def _differ_config() -> bytes:
+    """
+    Read the configuration files of the differ found on the system (installation
+    then per-user ones), as they change the diffing results. The installation
+    must have been checked beforehand.
+
+    :return: paths and contents of the configuration files found
+    """
+    assert BINDIFF_BINARY is not None  # for mypy
+    home = Path.home()
+    # fmt: off
+    candidates = [BINDIFF_BINARY.parent.parent / "etc" / "bindiff.json",    # BinDiff >= 7
+                  BINDIFF_BINARY.parent / "bindiff.json",
+                  BINDIFF_BINARY.parent / "bindiff_core.xml",               # BinDiff 6
+                  home / ".bindiff" / "bindiff.json",                       # per-user (Linux)
+                  home / "Library" / "Application Support" / "BinDiff" / "bindiff.json"]  # (macOS)
+    # fmt: on
+    if "APPDATA" in os.environ:  # per-user (Windows)
+        candidates.append(Path(os.environ["APPDATA"]) / "BinDiff" / "bindiff.json")
+
+    config = b""
+    for file in candidates:
+        try:
+            config += str(file).encode() + b"\0" + file.read_bytes() + b"\0"
+        except OSError:  # not found, or unreadable thus not used by the differ either
+            continue
+    return config
+
+
 class BinDiff(BindiffFile):
     """
     BinDiff class. Parse the diffing result of Bindiff and apply it to the two
@@ -81,21 +119,148 @@ class BinDiff(BindiffFile):
 
     def __init__(
         self,
-        primary: Union[ProgramBinExport, str],
-        secondary: Union[ProgramBinExport, str],
+        primary: Union[ProgramBinExport, Path, str],
+        secondary: Union[ProgramBinExport, Path, str],
         diff_file: Union[Path, str],
+        lazy: bool = False,
+        backend: str = "memory",
+        cache: DiffCache | None = None,
+        profile: ConnectionProfile | None = None,
+        parallel_load: bool = False,
+        load_filter: LoadFilter | None = None,
     ):
         """
-        :param primary: first program diffed
-        :param secondary: second program diffed
+        :param primary: first program diffed (object, or path of the .BinExport loaded on first access)
+        :param secondary: second program diffed (object, or path of the .BinExport loaded on first access)
         :param diff_file: diffing file as generated by bindiff (differ more specifically)
+        :param lazy: if True, match tables are only loaded on first access
+        :param backend: 'memory' (default) or 'sqlite' to query matches from database on demand
+        :param cache: on-disk cache of parsed diffs (see :py:class:`DiffCache`)
+        :param profile: database connection settings (see :py:class:`ConnectionProfile`)
+        :param parallel_load: read the match tables of the diff file in parallel
+        :param load_filter: only load the matches of the selected functions. Functions matched
+                            in the diff file but not selected are not reported as unmatched.
+                            Lookups about a single one of them (its match, its basic blocks
+                            or instructions) raise ValueError, :py:meth:`get_matches` gives
+                            None for them.
+        """
+        # fmt: off
+        super(BinDiff, self).__init__(diff_file, lazy=lazy, backend=backend, cache=cache,
+                                      profile=profile, parallel_load=parallel_load,
+                                      load_filter=load_filter)
+        # fmt: on
+
+        # Unmatched items computed so far: (kind, side, addresses...) -> items
+        self._unmatched_cache: dict[tuple, tuple | frozenset] = {}
+        self._unmatched_generation = self._generation
+
+        # Programs given as paths are only parsed when accessed
+        self._primary: ProgramBinExport | None = None
+        self._secondary: ProgramBinExport | None = None
+        self._primary_path, self._secondary_path = None, None
+        self.primary = primary
+        self.secondary = secondary
+
+    @property
+    def primary(self) -> ProgramBinExport:
+        """
+        Primary BinExport object (parsed on first access if given as a path)
+        """
+        if self._primary is None:
+            self._primary = ProgramBinExport(self._primary_path)
+        return self._primary
+
+    @primary.setter
+    def primary(self, program: Union[ProgramBinExport, Path, str]) -> None:
+        if isinstance(program, (str, Path)):
+            self._primary, self._primary_path = None, program
+        else:
+            self._primary, self._primary_path = program, None
+        self._unmatched_cache.clear()
+
+    @property
+    def secondary(self) -> ProgramBinExport:
+        """
+        Secondary BinExport object (parsed on first access if given as a path)
+        """
+        if self._secondary is None:
+            self._secondary = ProgramBinExport(self._secondary_path)
+        return self._secondary
+
+    @secondary.setter
+    def secondary(self, program: Union[ProgramBinExport, Path, str]) -> None:
+        if isinstance(program, (str, Path)):
+            self._secondary, self._secondary_path = None, program
+        else:
+            self._secondary, self._secondary_path = program, None
+        self._unmatched_cache.clear()
+
+    def _cached_unmatched(self, key: tuple, compute):
+        """
+        Get unmatched items from the cache, computing them on the first call.
+        The cache is dropped when a program is replaced, and when matches are
+        added with the ``add_*`` methods (only possible on a diff opened 'rw').
+        Match tables modified in place are not detected.
+
+        :param key: kind, side and addresses of the items
+        :param compute: function computing the items
+        :return: the unmatched items
+        """
+        if self._unmatched_generation != self._generation:
+            self._unmatched_cache.clear()
+            self._unmatched_generation = self._generation
+        if (items := self._unmatched_cache.get(key)) is None:
+            items = self._unmatched_cache[key] = compute()
+        return items
+
+    def _matched_function_addrs(self, side: int) -> AbstractSet[int]:
+        """
+        Addresses of the functions matched in the diff file, whether their
+        match is selected by the load filter or not.
         """
-        super(BinDiff, self).__init__(diff_file)
+        matches = self.primary_functions_match if side == 1 else self.secondary_functions_match
+        if self._load_filter is None:
+            return matches.keys()
 
-        #: Primary BinExport object
-        self.primary = ProgramBinExport(primary) if isinstance(primary, str) else primary
-        #: Secondary BinExport object
-        self.secondary = ProgramBinExport(secondary) if isinstance(secondary, str) else secondary
+        def compute():
+            return frozenset(_i2u(x) for (x,) in self.db.execute(f"SELECT address{side} FROM function"))
+
+        return self._cached_unmatched(("matched_function_addrs", side), compute)
+
+    def _check_unmatched(self, addr: int, side: int) -> None:
+        """
+        Check that a function missing from the function matches is actually unmatched
+        (only needed on misses, thus lookups of matched functions are not slowed down).
+
+        :raise ValueError: if the function is matched but its match is not selected by the load filter
+        """
+        if self._load_filter is not None and addr in self._matched_function_addrs(side):
+            raise ValueError(f"the match of function {addr:#x} is not selected by the load filter")
+
+    def _function_match(self, addr: int, side: int) -> FunctionMatch | None:
+        """
+        Get the match of a function (None if unmatched).
+
+        :raise ValueError: if the function is matched but its match is not selected by the load filter
+        """
+        matches = self.primary_functions_match if side == 1 else self.secondary_functions_match
+        if (match := matches.get(addr)) is None:
+            self._check_unmatched(addr, side)
+        return match
+
+    def _unmatched_function_addrs(self, side: int) -> frozenset[int]:
+        def compute():
+            program = self.primary if side == 1 else self.secondary
+            return frozenset(program.keys() - self._matched_function_addrs(side))
+
+        return self._cached_unmatched(("function_addrs", side), compute)
+
+    def _unmatched_functions(self, side: int) -> list[FunctionBinExport]:
+        def compute():
+            program = self.primary if side == 1 else self.secondary
+            return tuple(program[x] for x in sorted(self._unmatched_function_addrs(side)))
+
+        return list(self._cached_unmatched(("function", side), compute))
 
     def primary_unmatched_function(self) -> list[FunctionBinExport]:
         """
@@ -103,11 +268,7 @@ class BinDiff(BindiffFile):
 
         :return: list of unmatched functions in primary
         """
-        funs = []
-        for fun_addr, fun in self.primary.items():
-            if fun_addr not in self.primary_functions_match:
-                funs.append(fun)
-        return funs
+        return self._unmatched_functions(1)
 
     def secondary_unmatched_function(self) -> list[FunctionBinExport]:
         """
@@ -115,11 +276,19 @@ class BinDiff(BindiffFile):
 
         :return: list of unmatched functions in secondary
         """
-        funs = []
-        for fun_addr, fun in self.secondary.items():
-            if fun_addr not in self.secondary_functions_match:
-                funs.append(fun)
-        return funs
+        return self._unmatched_functions(2)
+
+    def is_unmatched(self, addr: int, side: int = 1) -> bool:
+        """
+        Check whether a function of one of the programs is unmatched
+        (computed once for all the functions of the program).
+
+        :param addr: address of the function
+        :param side: 1 for the primary program, 2 for the secondary one
+        :return: True if the program has an unmatched function at this address
+        """
+        assert side in [1, 2]
+        return addr in self._unmatched_function_addrs(side)
 
     def iter_function_matches(
         self,
@@ -144,18 +313,31 @@ class BinDiff(BindiffFile):
                 )
         return matches
 
+    def _function_bb_matches(self, fun_match: FunctionMatch | None) -> list[BasicBlockMatch]:
+        """
+        Basic block matches of a function match (empty if the function is not matched)
+        """
+        if fun_match is None:
+            return []
+        return self.basicblock_matches_of(fun_match)
+
     def _unmatched_bbs(
-        self, function: FunctionBinExport, map: dict[int, dict[int, BasicBlockMatch]]
+        self, function: FunctionBinExport, side: int
     ) -> list[BasicBlockBinExport]:
-        bbs = []
-        for bb_addr, bb in function.items():
-            if maps := map.get(bb_addr):
-                # The block has been match but in another function thus unmatched here
-                if function.addr not in maps:
-                    bbs.append(bb)
-            else:
-                bbs.append(bb)
-        return bbs
+        key = ("basicblock", side, function.addr)
+        return list(self._cached_unmatched(key, lambda: tuple(self._compute_unmatched_bbs(function, side))))
+
+    def _compute_unmatched_bbs(
+        self, function: FunctionBinExport, side: int
+    ) -> list[BasicBlockBinExport]:
+        # Only the blocks matched within this function match count (a block might have been
+        # matched but in another function thus unmatched here)
+        bb_matches = self._function_bb_matches(self._function_match(function.addr, side))
+        if side == 1:
+            matched = {x.address1 for x in bb_matches}
+        else:
+            matched = {x.address2 for x in bb_matches}
+        return [bb for bb_addr, bb in function.items() if bb_addr not in matched]
 
     def primary_unmatched_basic_block(
         self, function: FunctionBinExport
@@ -166,8 +348,9 @@ class BinDiff(BindiffFile):
 
         :param function: A function of the primary program
         :return: list of unmatched basic blocks
+        :raise ValueError: if the function is matched but its match is not selected by the load filter
         """
-        return self._unmatched_bbs(function, self.primary_basicblock_match)
+        return self._unmatched_bbs(function, 1)
 
     def secondary_unmatched_basic_block(
         self, function: FunctionBinExport
@@ -178,8 +361,9 @@ class BinDiff(BindiffFile):
 
         :param function: A function of the secondary program
         :return: list of unmatched basic blocks
+        :raise ValueError: if the function is matched but its match is not selected by the load filter
         """
-        return self._unmatched_bbs(function, self.secondary_basicblock_match)
+        return self._unmatched_bbs(function, 2)
 
     def iter_basicblock_matches(
         self, function1: FunctionBinExport, function2: FunctionBinExport
@@ -195,22 +379,33 @@ class BinDiff(BindiffFile):
         :param function2: A function of the secondary program
         :return: list of tuple, each containing the primary basic block, the secondary basic block
                  and the BasicBlockMatch object
+        :raise ValueError: if the match of the first function is not selected by the load filter
         """
-        items = []
-        for bb_addr, bb in function1.items():
-            if maps := self.primary_basicblock_match.get(bb_addr):
-                if match := maps.get(function1.addr):
-                    items.append((bb, function2[match.address2], match))
-        return items
+        fun_match = self._function_match(function1.addr, 1)
+        return [
+            (function1[match.address1], function2[match.address2], match)
+            for match in self._function_bb_matches(fun_match)
+        ]
+
+    def _bb_instruction_matches(self, bb: BasicBlockBinExport, side: int) -> list[tuple[int, int]]:
+        """
+        Instruction matches (primary address, secondary address) of the match of a basic block
+        (empty if the basic block is not matched)
+
+        :raise ValueError: if the match of its function is not selected by the load filter
+        """
+        index = self.primary_basicblock_match if side == 1 else self.secondary_basicblock_match
+        if (match := index.get_for_function(bb.addr, bb.function.addr)) is None:
+            self._function_match(bb.function.addr, side)  # only checked on misses
+            return []
+        return self.instruction_matches_of(match)
 
     def _unmatched_instrs(
-        self, bb: BasicBlockBinExport, map: dict[int, dict[int, int]]
+        self, bb: BasicBlockBinExport, side: int
     ) -> list[InstructionBinExport]:
-        instrs = []
-        for addr, instr in bb.instructions.items():
-            if addr not in map:
-                instrs.append(instr)
-        return instrs
+        # Not cached: it only reads the instruction matches of this basic block
+        matched = {x[side - 1] for x in self._bb_instruction_matches(bb, side)}
+        return [instr for addr, instr in bb.instructions.items() if addr not in matched]
 
     def primary_unmatched_instruction(self, bb: BasicBlockBinExport) -> list[InstructionBinExport]:
         """
@@ -219,8 +414,9 @@ class BinDiff(BindiffFile):
 
         :param bb: A basic block belonging to the primary program
         :return: list of unmatched instructions
+        :raise ValueError: if its function is matched but its match is not selected by the load filter
         """
-        return self._unmatched_instrs(bb, self.primary_instruction_match)
+        return self._unmatched_instrs(bb, 1)
 
     def secondary_unmatched_instruction(
         self, bb: BasicBlockBinExport
@@ -231,8 +427,9 @@ class BinDiff(BindiffFile):
 
         :param bb: A basic block belonging to the secondary program
         :return: list of unmatched instructions
+        :raise ValueError: if its function is matched but its match is not selected by the load filter
         """
-        return self._unmatched_instrs(bb, self.secondary_instruction_match)
+        return self._unmatched_instrs(bb, 2)
 
     def iter_instruction_matches(
         self, block1: BasicBlockBinExport, block2: BasicBlockBinExport
@@ -247,38 +444,109 @@ class BinDiff(BindiffFile):
         :param block1: A basic block belonging to the primary program
         :param block2: A basic block belonging to the secondary program
         :return: list of tuple, each containing the primary instruction and the secondary instruction
+        :raise ValueError: if the match of the function of the first basic block is not selected
+                           by the load filter
+        """
+        return [
+            (block1.instructions[addr1], block2.instructions[addr2])
+            for addr1, addr2 in self._bb_instruction_matches(block1, 1)
+        ]
+
+    def match_of_primary(self, addr: int) -> tuple[FunctionBinExport, FunctionMatch] | None:
+        """
+        Get the match of a function of the primary program.
+
+        :param addr: address of the function in primary
+        :return: A tuple with the matched function (in secondary) and the match object if the
+                 function is matched, otherwise None
+        :raise ValueError: if the match is not selected by the load filter
         """
-        insts = []
-        for addr, instr in block1.instructions.items():
-            if inst_map := self.primary_instruction_match.get(addr):
-                if addr2 := inst_map.get(block1.function.addr):
-                    insts.append((instr, block2.instructions[addr2]))
-        return insts
+        if (match := self.primary_functions_match.get(addr)) is not None:
+            return self.secondary[match.address2], match
+        self._check_unmatched(addr, 1)
+        return None
+
+    def match_of_secondary(self, addr: int) -> tuple[FunctionBinExport, FunctionMatch] | None:
+        """
+        Get the match of a function of the secondary program.
+
+        :param addr: address of the function in secondary
+        :return: A tuple with the matched function (in primary) and the match object if the
+                 function is matched, otherwise None
+        :raise ValueError: if the match is not selected by the load filter
+        """
+        if (match := self.secondary_functions_match.get(addr)) is not None:
+            return self.primary[match.address1], match
+        self._check_unmatched(addr, 2)
+        return None
 
     def get_match(
         self, function: FunctionBinExport
     ) -> tuple[FunctionBinExport, FunctionMatch] | None:
         """
         Get the function that matches the provided one.
+        The program of the function is identified by identity (both programs might
+        have a function at the same address).
 
         :param function: A function that belongs either to primary or secondary
         :return: A tuple with the matched function and the match object if there is a match for
                  the provided function, otherwise None
+        :raise ValueError: if the match is not selected by the load filter
         """
-        if self.primary.get(function.addr) == function:
-            if match := self.primary_functions_match.get(function.addr):
+        addr = function.addr
+        if self.primary.get(addr) is function:
+            if (match := self.primary_functions_match.get(addr)) is not None:
                 return self.secondary[match.address2], match
-        elif self.secondary.get(function.addr) == function:
-            if match := self.secondary_functions_match.get(function.addr):
+            self._check_unmatched(addr, 1)
+        elif self.secondary.get(addr) is function:
+            if (match := self.secondary_functions_match.get(addr)) is not None:
                 return self.primary[match.address1], match
+            self._check_unmatched(addr, 2)
         return None
 
+    def get_matches(
+        self, functions: Iterable[FunctionBinExport]
+    ) -> list[tuple[FunctionBinExport, FunctionMatch] | None]:
+        """
+        Get the matches of many functions at once (see :py:meth:`get_match`). Unlike
+        :py:meth:`get_match`, a function whose match is not selected by the load filter
+        does not raise: it gets None, as unmatched functions (:py:meth:`is_matched`
+        tells them apart).
+
+        :param functions: functions belonging either to primary or secondary
+        :return: list of the matches (None for unmatched functions and for the matches not
+                 selected by the load filter), in the same order
+        """
+        primary, secondary = self.primary, self.secondary
+        p_match, s_match = self.primary_functions_match.get, self.secondary_functions_match.get
+        matches = []
+        for function in functions:
+            addr = function.addr
+            if primary.get(addr) is function:
+                if (match := p_match(addr)) is not None:
+                    matches.append((secondary[match.address2], match))
+                    continue
+            elif secondary.get(addr) is function:
+                if (match := s_match(addr)) is not None:
+                    matches.append((primary[match.address1], match))
+                    continue
+            matches.append(None)
+        return matches
+
     def is_matched(self, function: FunctionBinExport) -> bool:
         """
         :param function: A function that belongs either to primary or secondary.
-        :return: True if there is a match for the provided function, False otherwise
-        """
-        return self.get_match(function) is not None
+        :return: True if there is a match for the provided function (selected by the load
+                 filter or not), False otherwise
+        """
+        addr = function.addr
+        filtered = self._load_filter is not None
+        if self.primary.get(addr) is function:
+            return addr in self.primary_functions_match or (filtered and addr in self._matched_function_addrs(1))
+        # fmt: off
+        return self.secondary.get(addr) is function and (addr in self.secondary_functions_match or
+                                                         (filtered and addr in self._matched_function_addrs(2)))
+        # fmt: on
 
     @staticmethod
     def _fix_up_filename(p1_path: Path, p2_path: Path, out_diff: Path):
@@ -292,15 +560,26 @@ class BinDiff(BindiffFile):
         p2_path = p2_path.with_suffix("") if p2_path.suffix == ".BinExport" else p2_path
         p1_relpath = Path(os.path.relpath(p1_path, start=out_diff.parent))
         p2_relpath = Path(os.path.relpath(p2_path, start=out_diff.parent))
-        
-        diff_file = BindiffFile(out_diff, permission = "rw")
-        diff_file.update_filename(1, str(p1_relpath))
-        diff_file.update_filename(2, str(p2_relpath))
-        diff_file.commit()
-        diff_file.close()
+
+        # Both rows are updated in a single transaction on a bare connection
+        db = sqlite3.connect(out_diff)
+        try:
+            with db:
+                db.executemany(
+                    "UPDATE file SET filename = ? WHERE id = ?",
+                    [(str(p1_relpath), 1), (str(p2_relpath), 2)],
+                )
+        finally:
+            db.close()
 
     @staticmethod
-    def raw_diffing(p1_path: Union[Path, str], p2_path: Union[Path, str], out_diff: Union[Path, str]) -> bool:
+    def raw_diffing(
+        p1_path: Union[Path, str],
+        p2_path: Union[Path, str],
+        out_diff: Union[Path, str],
+        cache: DiffResultCache | None = None,
+        timeout: float | None = None,
+    ) -> bool:
         """
         Static method to diff two binexport files against each other and storing
         the diffing result in the given file
@@ -308,41 +587,103 @@ class BinDiff(BindiffFile):
         :param p1_path: primary file path
         :param p2_path: secondary file path
         :param out_diff: diffing output file
-        :return: True if successful, False otherwise
+        :param cache: cache of diff results, the differ is not run if the diff is in cache
+        :param timeout: maximum duration of the diffing in seconds (no limit if None)
+        :return: True if successful, False otherwise (including timeout)
         """
 
         # Make sure the bindiff binary is okay before doing any diffing
         BinDiff.assert_installation_ok()
 
-        tmp_dir = Path(tempfile.mkdtemp())
         f1 = Path(p1_path)
         f2 = Path(p2_path)
+        out_diff = Path(out_diff)
+        for f in [f1, f2]:
+            if not f.exists():
+                logging.error(f"file '{f}' doesn't exist")
+                return False
 
-        if not f1.exists():
-            logging.error(f"file '{p1_path}' doesn't exist")
-            return False
+        if cache is not None and BinDiff._fetch_cached_diff(cache, f1, f2, out_diff):
+            return True
 
-        if not f2.exists():
-            logging.error(f"file '{p2_path}' doesn't exist")
-            return False
-            
+        # The differ writes next to the destination so that moving the diff is a rename
+        tmp_dir = Path(tempfile.mkdtemp(dir=out_diff.parent, prefix=".bindiff-"))
+        try:
+            cmd_line = BinDiff._diffing_command(f1, f2, tmp_dir)
+
+            logging.debug(f"run diffing: {' '.join(cmd_line)}")
+            try:
+                # fmt: off
+                process = subprocess.run(cmd_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                         timeout=timeout)
+                # fmt: on
+            except subprocess.TimeoutExpired:
+                logging.error(f"differ timed out after {timeout}s: {f1} vs {f2}")
+                return False
+
+            if process.returncode != 0:
+                logging.error(f"differ terminated with error code: {process.returncode}")
+                return False
+
+            return BinDiff._collect_diff(f1, f2, tmp_dir, out_diff, cache)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _diffing_command(f1: Path, f2: Path, output_dir: Path) -> list[str]:
+        """
+        Command line of the differ (the installation must have been checked)
+
+        :param f1: primary file path
+        :param f2: secondary file path
+        :param output_dir: directory where the differ writes the diff
+        :return: command line arguments
+        """
         assert BINDIFF_BINARY is not None  # for mypy
-        cmd_line = [
+        return [
             BINDIFF_BINARY.as_posix(),
-            f"--primary={p1_path}",
-            f"--secondary={p2_path}",
-            f"--output_dir={tmp_dir.as_posix()}",
+            f"--primary={f1}",
+            f"--secondary={f2}",
+            f"--output_dir={output_dir.as_posix()}",
         ]
 
-        logging.debug(f"run diffing: {' '.join(cmd_line)}")
-        process = subprocess.Popen(cmd_line, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        out, err = process.communicate()
-        retcode = process.returncode
-        
-        if retcode != 0:
-            logging.error(f"differ terminated with error code: {retcode}")
+    @staticmethod
+    def _cache_key(cache: DiffResultCache, f1: Path, f2: Path) -> str:
+        """
+        Key of a diff in the result cache, covering the configuration of the differ
+        (the installation must have been checked)
+        """
+        assert BINDIFF_BINARY is not None  # for mypy
+        return cache.key(f1, f2, BINDIFF_BINARY, _differ_config())
+
+    @staticmethod
+    def _fetch_cached_diff(cache: DiffResultCache, f1: Path, f2: Path, out_diff: Path) -> bool:
+        """
+        Get a diff from the result cache and fix up the paths of the programs for its location.
+
+        :return: True on cache hit, False otherwise
+        """
+        if not cache.fetch(BinDiff._cache_key(cache, f1, f2), out_diff):
             return False
-        
+        logging.debug(f"diff found in cache: {f1} vs {f2}")
+        BinDiff._fix_up_filename(f1, f2, out_diff)
+        return True
+
+    @staticmethod
+    def _collect_diff(
+        f1: Path, f2: Path, tmp_dir: Path, out_diff: Path, cache: DiffResultCache | None = None
+    ) -> bool:
+        """
+        Move the diff generated by the differ to its destination (storing it in the
+        result cache if any) and fix up the paths of the programs inside.
+
+        :param f1: primary file path
+        :param f2: secondary file path
+        :param tmp_dir: output directory of the differ
+        :param out_diff: diffing output file
+        :param cache: cache of diff results
+        :return: True if the diff has been found, False otherwise
+        """
         # Now look for the generated file
         out_file = tmp_dir / "{}_vs_{}.BinDiff".format(f1.stem, f2.stem)
 
@@ -361,13 +702,95 @@ class BinDiff(BindiffFile):
             if not found:
                 logging.error("diff file .BinDiff not found")
                 return False
-        shutil.rmtree(tmp_dir, ignore_errors=True)
 
-        #Fixup filename withing BinDiff file
-        BinDiff._fix_up_filename(f1, f2, Path(out_diff))
+        if cache is not None:
+            cache.insert(BinDiff._cache_key(cache, f1, f2), out_diff)
 
+        #Fixup filename withing BinDiff file
+        BinDiff._fix_up_filename(f1, f2, out_diff)
         return True
 
+    @staticmethod
+    def _kill_differ(process: asyncio.subprocess.Process) -> None:
+        """
+        Kill a differ process (and its process group where supported)
+        """
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:  # already terminated
+            pass
+
+    @staticmethod
+    async def araw_diffing(
+        p1_path: Union[Path, str],
+        p2_path: Union[Path, str],
+        out_diff: Union[Path, str],
+        timeout: float | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+        cache: DiffResultCache | None = None,
+    ) -> bool:
+        """
+        Asynchronous counterpart of :py:meth:`raw_diffing`. The differ is killed if
+        the timeout expires or if the task is cancelled (the cancellation is then
+        propagated).
+
+        :param p1_path: primary file path
+        :param p2_path: secondary file path
+        :param out_diff: diffing output file
+        :param timeout: maximum duration of the diffing in seconds (no limit if None)
+        :param semaphore: semaphore shared by tasks to limit the number of concurrent differs
+        :param cache: cache of diff results, the differ is not run if the diff is in cache
+        :return: True if successful, False otherwise (including timeout)
+        """
+        if semaphore is not None:
+            async with semaphore:
+                return await BinDiff.araw_diffing(p1_path, p2_path, out_diff, timeout, cache=cache)
+
+        # Make sure the bindiff binary is okay before doing any diffing
+        BinDiff.assert_installation_ok()
+
+        f1 = Path(p1_path)
+        f2 = Path(p2_path)
+        for f in [f1, f2]:
+            if not f.exists():
+                logging.error(f"file '{f}' doesn't exist")
+                return False
+
+        if cache is not None:
+            if await asyncio.to_thread(BinDiff._fetch_cached_diff, cache, f1, f2, Path(out_diff)):
+                return True
+
+        tmp_dir = Path(tempfile.mkdtemp(dir=Path(out_diff).parent, prefix=".bindiff-"))
+        try:
+            cmd_line = BinDiff._diffing_command(f1, f2, tmp_dir)
+            logging.debug(f"run diffing: {' '.join(cmd_line)}")
+            # The differ runs in its own process group to kill it along with its children
+            # fmt: off
+            process = await asyncio.create_subprocess_exec(*cmd_line, stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.PIPE,
+                                                           start_new_session=hasattr(os, "killpg"))
+            # fmt: on
+            try:
+                await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                logging.error(f"differ timed out after {timeout}s: {f1} vs {f2}")
+                return False
+            finally:
+                if process.returncode is None:  # timeout or cancellation
+                    BinDiff._kill_differ(process)
+                    await asyncio.shield(process.wait())
+
+            if process.returncode != 0:
+                logging.error(f"differ terminated with error code: {process.returncode}")
+                return False
+
+            return await asyncio.to_thread(BinDiff._collect_diff, f1, f2, tmp_dir, Path(out_diff), cache)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
     @staticmethod
     def from_binary_files(
         p1_path: str, p2_path: str, diff_out: str, override: bool = False
@@ -397,6 +820,7 @@ class BinDiff(BindiffFile):
         p2_binexport: Union[ProgramBinExport, str],
         diff_out: Union[Path, str],
         override: bool = False,
+        cache: DiffResultCache | None = None,
     ) -> Optional["BinDiff"]:
         """
         Diff two binexport files. Diff the two binexport files with bindiff
@@ -406,17 +830,90 @@ class BinDiff(BindiffFile):
         :param p2_binexport: secondary binexport file to diff (path or object)
         :param diff_out: output file for the diff
         :param override: override Binexports files and diffing
+        :param cache: cache of diff results, the differ is not run if the diff is in cache
         :return: BinDiff object representing the diff
         """
         p1_path = p1_binexport.path if isinstance(p1_binexport, ProgramBinExport) else p1_binexport
         p2_path = p2_binexport.path if isinstance(p2_binexport, ProgramBinExport) else p2_binexport
 
         if not Path(diff_out).exists() or override:
-            retcode = BinDiff.raw_diffing(p1_path, p2_path, diff_out)
+            retcode = BinDiff.raw_diffing(p1_path, p2_path, diff_out, cache)
             return BinDiff(p1_binexport, p2_binexport, diff_out) if retcode else None
         else:
             return BinDiff(p1_binexport, p2_binexport, diff_out)
 
+    @staticmethod
+    async def afrom_binexport_files(
+        p1_binexport: Union[ProgramBinExport, str],
+        p2_binexport: Union[ProgramBinExport, str],
+        diff_out: Union[Path, str],
+        override: bool = False,
+        timeout: float | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+        cache: DiffResultCache | None = None,
+    ) -> Optional["BinDiff"]:
+        """
+        Asynchronous counterpart of :py:meth:`from_binexport_files`. The diff file
+        is loaded in a worker thread not to block the event loop.
+
+        :param p1_binexport: primary binexport file to diff (path or object)
+        :param p2_binexport: secondary binexport file to diff (path or object)
+        :param diff_out: output file for the diff
+        :param override: override Binexports files and diffing
+        :param timeout: maximum duration of the diffing in seconds (no limit if None)
+        :param semaphore: semaphore shared by tasks to limit the number of concurrent differs
+        :param cache: cache of diff results, the differ is not run if the diff is in cache
+        :return: BinDiff object representing the diff
+        """
+        p1_path = p1_binexport.path if isinstance(p1_binexport, ProgramBinExport) else p1_binexport
+        p2_path = p2_binexport.path if isinstance(p2_binexport, ProgramBinExport) else p2_binexport
+
+        if not Path(diff_out).exists() or override:
+            if not await BinDiff.araw_diffing(p1_path, p2_path, diff_out, timeout, semaphore, cache):
+                return None
+        return await asyncio.to_thread(BinDiff, p1_binexport, p2_binexport, diff_out)
+
+    @staticmethod
+    def diff_many(
+        pairs: Iterable[Union["DiffJob", tuple]],
+        workers: int = 1,
+        timeout: int | None = None,
+        export_workers: int | None = None,
+        diff_workers: int | None = None,
+        backend: DisassemblerBackend = DisassemblerBackend.IDA,
+        override: bool = False,
+        cache: DiffResultCache | None = None,
+        max_pending: int | None = None,
+        store: BinExportStore | None = None,
+        heavy: Callable[["DiffJob"], bool] | None = None,
+        max_heavy: int | None = None,
+    ) -> Iterator["DiffResult"]:
+        """
+        Diff many pairs of programs (binaries or .BinExport files) in worker processes,
+        see :py:func:`bindiff.batch.diff_many`. Failures are reported per pair.
+
+        :param pairs: jobs, or tuples (primary, secondary[, output])
+        :param workers: default number of concurrent exports and of concurrent diffs
+        :param timeout: timeout of each export and each diff in seconds (no limit if None)
+        :param export_workers: number of concurrent exports (default: workers)
+        :param diff_workers: number of concurrent diffs (default: workers)
+        :param backend: disassembler used to export binaries
+        :param override: override existing .BinExport files
+        :param cache: cache of diff results
+        :param max_pending: maximum number of jobs in flight (default: twice the number of workers)
+        :param store: store of BinExport files reused across pairs and runs
+        :param heavy: predicate of the jobs whose diff is heavy (e.g: in memory)
+        :param max_heavy: maximum number of heavy diffs running concurrently (no limit if None)
+        :return: iterator of DiffResult, as they complete
+        """
+        from bindiff.batch import diff_many
+
+        BinDiff.assert_installation_ok()
+        # fmt: off
+        return diff_many(pairs, export_workers or workers, diff_workers or workers, backend, timeout,
+                         override, cache, max_pending, store, heavy, max_heavy)
+        # fmt: on
+
     @staticmethod
     def _configure_bindiff_path() -> None:
         """
@@ -438,7 +935,9 @@ class BinDiff(BindiffFile):
         :raise BindiffNotFound: if the bindiff binary cannot be found
         """
 
-        BinDiff._configure_bindiff_path()
+        # The lookup is only done once the binary is found
+        if BINDIFF_BINARY is None:
+            BinDiff._configure_bindiff_path()
         if BINDIFF_BINARY is None:
             raise BindiffNotFound()
 
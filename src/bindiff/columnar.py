@@ -0,0 +1,337 @@
+from __future__ import annotations
+import sqlite3
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+from bindiff.types import FunctionAlgorithm, BasicBlockAlgorithm
+from bindiff.file import FunctionMatch, BasicBlockMatch
+
+
+def _check_numpy() -> None:
+    """
+    Make sure numpy is available
+
+    :raise ImportError: if numpy is not installed
+    """
+    if np is None:
+        raise ImportError(
+            "numpy is required for the columnar representation (pip install python-bindiff[columnar])"
+        )
+
+
+class _MatchColumns(object):
+    """
+    Columnar representation of a match table. Each column is a NumPy array
+    and all columns are sorted on ``address1``. A permutation sorting rows on
+    ``address2`` is kept to answer secondary lookups.
+    """
+
+    #: column name -> dtype (addresses are read as signed then reinterpreted as unsigned)
+    FIELDS: dict[str, str] = {}
+    #: SQL query returning the columns in the same order than FIELDS
+    QUERY: str = ""
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        """
+        :param columns: column name -> array (all of the same length)
+        """
+        _check_numpy()
+        order = np.argsort(columns["address1"], kind="stable")
+        self.columns: dict[str, np.ndarray] = {k: v[order] for k, v in columns.items()}
+        self._order2 = np.argsort(self.columns["address2"], kind="stable")
+
+    @classmethod
+    def from_cursor(cls, cursor: sqlite3.Cursor):
+        """
+        Fill the columns straight from the rows returned by the database.
+
+        :param cursor: sqlite3 cursor to the DB
+        :return: instance of the class
+        """
+        _check_numpy()
+        dtype = [(k, "i8" if v == "u8" else v) for k, v in cls.FIELDS.items()]
+        data = np.fromiter(cursor.execute(cls.QUERY), dtype=dtype)
+        columns = {}
+        for name, typ in cls.FIELDS.items():
+            # Bindiff stores addresses as signed 64-bit integers, reinterpret them without copy
+            columns[name] = data[name].view(np.uint64) if typ == "u8" else data[name].copy()
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["address1"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def lookup(self, addresses, side: int = 1) -> np.ndarray:
+        """
+        Look up many addresses at once. For addresses matched multiple times,
+        the first row is returned.
+
+        :param addresses: iterable or array of addresses
+        :param side: 1 to search primary addresses, 2 for secondary ones
+        :return: array of row indexes (-1 where the address is not matched)
+        """
+        assert side in [1, 2]
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        if side == 1:
+            keys, order = self.columns["address1"], None
+        else:
+            keys, order = self.columns["address2"][self._order2], self._order2
+
+        if len(keys) == 0:
+            return np.full(len(addresses), -1, dtype=np.int64)
+
+        idx = np.minimum(np.searchsorted(keys, addresses), len(keys) - 1)
+        rows = idx if order is None else order[idx]
+        return np.where(keys[idx] == addresses, rows, -1)
+
+    def select(self, mask: np.ndarray):
+        """
+        Return a new instance only containing the selected rows.
+
+        :param mask: boolean mask or array of row indexes
+        :return: instance of the same class
+        """
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.columns = {k: v[mask] for k, v in self.columns.items()}
+        new._order2 = np.argsort(new.columns["address2"], kind="stable")
+        return new
+
+    def histogram(self, name: str, bins: int = 10, range: tuple[float, float] | None = None):
+        """
+        Compute the histogram of a column.
+
+        :param name: column name (e.g: similarity, confidence)
+        :param bins: number of bins
+        :param range: lower and upper range of the bins (default: min and max of the column)
+        :return: a tuple (counts, bin_edges) as given by :py:func:`numpy.histogram`
+        """
+        return np.histogram(self.columns[name], bins=bins, range=range)
+
+
+class FunctionMatchColumns(_MatchColumns):
+    """
+    Columnar representation of the ``function`` table.
+    """
+
+    FIELDS = {
+        "id": "i8",
+        "address1": "u8",
+        "address2": "u8",
+        "similarity": "f8",
+        "confidence": "f8",
+        "algorithm": "u1",
+    }
+    QUERY = "SELECT id, address1, address2, similarity, confidence, algorithm FROM function"
+
+    def __init__(
+        self, columns: dict[str, np.ndarray], names: dict[int, tuple[str, str]] | None = None
+    ):
+        """
+        :param columns: column name -> array (all of the same length)
+        :param names: function match id -> (name1, name2), used to create views
+        """
+        super(FunctionMatchColumns, self).__init__(columns)
+        self._names = names if names is not None else {}
+        self._id_order = np.argsort(self.columns["id"], kind="stable")
+
+    @classmethod
+    def from_cursor(cls, cursor: sqlite3.Cursor) -> FunctionMatchColumns:
+        """
+        Fill the columns straight from the rows returned by the database.
+
+        :param cursor: sqlite3 cursor to the DB
+        :return: instance of the class
+        """
+        new = super(FunctionMatchColumns, cls).from_cursor(cursor)
+        new._names = {
+            id: (n1, n2) for id, n1, n2 in cursor.execute("SELECT id, name1, name2 FROM function")
+        }
+        return new
+
+    def select(self, mask: np.ndarray) -> FunctionMatchColumns:
+        new = super(FunctionMatchColumns, self).select(mask)
+        new._id_order = np.argsort(new.columns["id"], kind="stable")
+        return new
+
+    def filter(
+        self,
+        min_similarity: float | None = None,
+        max_similarity: float | None = None,
+        min_confidence: float | None = None,
+        max_confidence: float | None = None,
+        algorithms: list[FunctionAlgorithm] | None = None,
+    ) -> FunctionMatchColumns:
+        """
+        Select the function matches satisfying all the given criteria.
+
+        :param min_similarity: minimum similarity (inclusive)
+        :param max_similarity: maximum similarity (inclusive)
+        :param min_confidence: minimum confidence (inclusive)
+        :param max_confidence: maximum confidence (inclusive)
+        :param algorithms: algorithms to keep
+        :return: a new FunctionMatchColumns with the selected rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_similarity is not None:
+            mask &= self.columns["similarity"] >= min_similarity
+        if max_similarity is not None:
+            mask &= self.columns["similarity"] <= max_similarity
+        if min_confidence is not None:
+            mask &= self.columns["confidence"] >= min_confidence
+        if max_confidence is not None:
+            mask &= self.columns["confidence"] <= max_confidence
+        if algorithms is not None:
+            mask &= np.isin(self.columns["algorithm"], [int(x) for x in algorithms])
+        return self.select(mask)
+
+    def rows_of_ids(self, ids) -> np.ndarray:
+        """
+        Get the row indexes of the given function match ids.
+
+        :param ids: iterable or array of function match ids
+        :return: array of row indexes (-1 where the id does not exist)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        keys = self.columns["id"][self._id_order]
+        if len(keys) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+
+        idx = np.minimum(np.searchsorted(keys, ids), len(keys) - 1)
+        return np.where(keys[idx] == ids, self._id_order[idx], -1)
+
+    def algorithm_counts(self) -> dict[FunctionAlgorithm, int]:
+        """
+        :return: number of matches per algorithm
+        """
+        counts = np.bincount(self.columns["algorithm"], minlength=max(FunctionAlgorithm) + 1)
+        return {algo: int(counts[algo]) for algo in FunctionAlgorithm if counts[algo]}
+
+    def view(self, row: int) -> FunctionMatch:
+        """
+        Create the FunctionMatch dataclass of the given row.
+
+        :param row: row index
+        :return: FunctionMatch object
+        :raise IndexError: if the row is negative (-1 stands for "not found" in lookups)
+        """
+        if row < 0:
+            raise IndexError(f"invalid row {row}")
+        c = self.columns
+        id = int(c["id"][row])
+        name1, name2 = self._names.get(id, ("", ""))
+        return FunctionMatch(
+            id,
+            int(c["address1"][row]),
+            name1,
+            int(c["address2"][row]),
+            name2,
+            float(c["similarity"][row]),
+            float(c["confidence"][row]),
+            FunctionAlgorithm(int(c["algorithm"][row])),
+        )
+
+    def views(self, rows=None) -> Iterator[FunctionMatch]:
+        """
+        Iterate FunctionMatch dataclasses of the given rows (all of them by default).
+
+        :param rows: iterable of row indexes
+        """
+        for row in range(len(self)) if rows is None else rows:
+            yield self.view(int(row))
+
+
+class BasicBlockMatchColumns(_MatchColumns):
+    """
+    Columnar representation of the ``basicblock`` table.
+    """
+
+    FIELDS = {
+        "id": "i8",
+        "function_id": "i8",
+        "address1": "u8",
+        "address2": "u8",
+        "algorithm": "u1",
+    }
+    QUERY = "SELECT id, functionid, address1, address2, algorithm FROM basicblock"
+
+    def __init__(
+        self, columns: dict[str, np.ndarray], functions: FunctionMatchColumns | None = None
+    ):
+        """
+        :param columns: column name -> array (all of the same length)
+        :param functions: function match columns, used to create views
+        """
+        super(BasicBlockMatchColumns, self).__init__(columns)
+        self.functions = functions
+
+    def filter(
+        self,
+        algorithms: list[BasicBlockAlgorithm] | None = None,
+        function_ids=None,
+    ) -> BasicBlockMatchColumns:
+        """
+        Select the basic block matches satisfying all the given criteria.
+
+        :param algorithms: algorithms to keep
+        :param function_ids: function match ids to keep (e.g: ``functions.filter(...)["id"]``)
+        :return: a new BasicBlockMatchColumns with the selected rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if algorithms is not None:
+            mask &= np.isin(self.columns["algorithm"], [int(x) for x in algorithms])
+        if function_ids is not None:
+            mask &= np.isin(self.columns["function_id"], np.asarray(function_ids, dtype=np.int64))
+        return self.select(mask)
+
+    def algorithm_counts(self) -> dict[BasicBlockAlgorithm, int]:
+        """
+        :return: number of matches per algorithm
+        """
+        counts = np.bincount(self.columns["algorithm"], minlength=max(BasicBlockAlgorithm) + 1)
+        return {algo: int(counts[algo]) for algo in BasicBlockAlgorithm if counts[algo]}
+
+    def view(self, row: int) -> BasicBlockMatch:
+        """
+        Create the BasicBlockMatch dataclass of the given row.
+
+        :param row: row index
+        :return: BasicBlockMatch object
+        :raise IndexError: if the row is negative (-1 stands for "not found" in lookups)
+        :raise KeyError: if the function match of the basic block is not in :py:attr:`functions`
+        """
+        assert self.functions is not None, "function columns are required to create views"
+        if row < 0:
+            raise IndexError(f"invalid row {row}")
+        c = self.columns
+        fun_id = int(c["function_id"][row])
+        if (fun_row := self.functions.rows_of_ids([fun_id])[0]) < 0:
+            raise KeyError(fun_id)
+        return BasicBlockMatch(
+            int(c["id"][row]),
+            self.functions.view(int(fun_row)),
+            int(c["address1"][row]),
+            int(c["address2"][row]),
+            BasicBlockAlgorithm(int(c["algorithm"][row])),
+        )
+
+    def views(self, rows=None) -> Iterator[BasicBlockMatch]:
+        """
+        Iterate BasicBlockMatch dataclasses of the given rows (all of them by default).
+
+        :param rows: iterable of row indexes
+        """
+        for row in range(len(self)) if rows is None else rows:
+            yield self.view(int(row))
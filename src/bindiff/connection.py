@@ -0,0 +1,93 @@
+from pathlib import Path
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Union
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """
+    Settings applied when opening a database. The default values correspond
+    to a bare SQLite connection.
+    """
+
+    # fmt: off
+    immutable: bool = False        #: open read-only databases with immutable=1 (no locking, only safe if nobody writes the file)
+    mmap_size: int = 0             #: maximum number of bytes of the file accessed with memory-mapped I/O
+    cache_size: int = -2000        #: page cache size (number of pages, or KiB if negative)
+    temp_store_memory: bool = False  #: keep temporary tables and indexes in memory
+    query_only: bool = False       #: forbid any write on read-only databases
+    in_memory_threshold: int = 0   #: read-only files up to this size (bytes) are entirely loaded in RAM
+    # fmt: on
+
+
+#: Bare SQLite connection (default)
+DEFAULT_PROFILE = ConnectionProfile()
+
+#: Profile tuned for read-only analysis of finished diffs (eg. stored on slow or network storage)
+READ_PROFILE = ConnectionProfile(
+    immutable=True,
+    mmap_size=1 << 30,
+    cache_size=-(256 << 10),
+    temp_store_memory=True,
+    query_only=True,
+    in_memory_threshold=256 << 20,
+)
+
+
+def _regexp(pattern: str, value: str | None) -> bool:
+    """
+    Implementation of the SQL REGEXP operator (``value REGEXP pattern``)
+    """
+    return value is not None and re.search(pattern, value) is not None
+
+
+def connect(
+    file: Union[Path, str], permission: str = "ro", profile: ConnectionProfile | None = None
+) -> sqlite3.Connection:
+    """
+    Open a database with the given permission and connection profile.
+    Read-only databases smaller than ``profile.in_memory_threshold`` are read
+    in one go and deserialized in memory (requires Python >= 3.11).
+
+    :param file: path to the database
+    :param permission: database permissions ('ro' or 'rw')
+    :param profile: connection profile (default: :py:data:`DEFAULT_PROFILE`)
+    :return: the sqlite3 connection
+    """
+    assert permission in ["ro", "rw"]
+    profile = profile if profile is not None else DEFAULT_PROFILE
+    read_only = permission == "ro"
+
+    db = None
+    if (
+        read_only
+        and profile.in_memory_threshold
+        and Path(file).stat().st_size <= profile.in_memory_threshold
+    ):
+        if hasattr(sqlite3.Connection, "deserialize"):
+            db = sqlite3.connect(":memory:")
+            db.deserialize(Path(file).read_bytes())
+        else:
+            logging.debug("sqlite3 deserialize is not available, open the file directly")
+
+    if db is None:
+        uri = f"file:{str(file)}?mode={permission}"
+        if read_only and profile.immutable:
+            uri += "&immutable=1"
+        db = sqlite3.connect(uri, uri=True)
+
+    # Used by load filters on function names
+    db.create_function("regexp", 2, _regexp, deterministic=True)
+
+    if profile.mmap_size:
+        db.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+    if profile.cache_size != DEFAULT_PROFILE.cache_size:
+        db.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+    if profile.temp_store_memory:
+        db.execute("PRAGMA temp_store = MEMORY")
+    if read_only and profile.query_only:
+        db.execute("PRAGMA query_only = ON")
+    return db
@@ -2,13 +2,27 @@ from pathlib import Path
 import sqlite3
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Union
-import ctypes
+from typing import Union, Iterable, Iterator, TYPE_CHECKING
+from collections.abc import Mapping
+import abc
+import functools
+import gc
+import logging
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
 
 from bindiff.types import FunctionAlgorithm, BasicBlockAlgorithm, function_algorithm_str, basicblock_algorithm_str
+from bindiff.cache import DiffCache
+from bindiff.connection import ConnectionProfile, connect
 
+if TYPE_CHECKING:
+    from bindiff.columnar import FunctionMatchColumns, BasicBlockMatchColumns
 
-@dataclass
+
+@dataclass(slots=True)
 class File:
     """
     File diffed in database.
@@ -31,7 +45,7 @@ class File:
     # fmt: on
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionMatch:
     """
     A match between two functions in database.
@@ -48,8 +62,15 @@ class FunctionMatch:
     algorithm: FunctionAlgorithm  #: algorithm used for the match
     # fmt: on
 
+    def __reduce__(self):
+        # Pickle as a constructor call (much faster to unpickle than slots state)
+        # fmt: off
+        return FunctionMatch, (self.id, self.address1, self.name1, self.address2, self.name2,
+                               self.similarity, self.confidence, self.algorithm)
+        # fmt: on
 
-@dataclass
+
+@dataclass(slots=True)
 class BasicBlockMatch:
     """
     A match between two basic blocks
@@ -63,6 +84,422 @@ class BasicBlockMatch:
     algorithm: BasicBlockAlgorithm  #: algorithm used to match the basic blocks
     # fmt: on
 
+    def __reduce__(self):
+        # Pickle as a constructor call (much faster to unpickle than slots state)
+        return BasicBlockMatch, (self.id, self.function_match, self.address1, self.address2, self.algorithm)
+
+
+_ADDR_MASK = 0xFFFFFFFFFFFFFFFF
+_FUNCTION_ALGORITHMS = {x.value: x for x in FunctionAlgorithm}
+_BASICBLOCK_ALGORITHMS = {x.value: x for x in BasicBlockAlgorithm}
+
+
+@dataclass(frozen=True)
+class LoadFilter:
+    """
+    Selection of the function matches to load. All the criteria given are
+    combined and pushed down in SQL, so that basic blocks and instructions
+    of unselected functions are never loaded.
+    """
+
+    # fmt: off
+    min_similarity: float | None = None  #: minimum similarity (inclusive)
+    max_similarity: float | None = None  #: maximum similarity (inclusive)
+    exclude_identical: bool = False      #: only keep functions with a similarity < 1.0
+    min_confidence: float | None = None  #: minimum confidence (inclusive)
+    address_range: tuple[int, int] | None = None  #: [start, end) range of primary function addresses
+    algorithms: tuple[FunctionAlgorithm, ...] | None = None  #: matching algorithms to keep
+    name_pattern: str | None = None      #: regular expression searched in primary or secondary names
+    # fmt: on
+
+    def sql(self, prefix: str = "") -> tuple[str, list]:
+        """
+        Get the SQL condition on the ``function`` table.
+
+        :param prefix: prefix of the function table columns (e.g. table alias "f.")
+        :return: SQL condition and its parameters
+        """
+        conds, params = ["1"], []
+        if self.min_similarity is not None:
+            conds.append(f"{prefix}similarity >= ?")
+            params.append(self.min_similarity)
+        if self.max_similarity is not None:
+            conds.append(f"{prefix}similarity <= ?")
+            params.append(self.max_similarity)
+        if self.exclude_identical:
+            conds.append(f"{prefix}similarity < 1.0")
+        if self.min_confidence is not None:
+            conds.append(f"{prefix}confidence >= ?")
+            params.append(self.min_confidence)
+        if self.address_range is not None:
+            start, end = self.address_range[0], self.address_range[1] - 1
+            if (start < (1 << 63)) == (end < (1 << 63)):  # addresses are signed in database
+                conds.append(f"{prefix}address1 BETWEEN ? AND ?")
+            else:
+                conds.append(f"({prefix}address1 >= ? OR {prefix}address1 <= ?)")
+            params.extend([_u2i(start), _u2i(end)])
+        if self.algorithms is not None:
+            conds.append(f"{prefix}algorithm IN ({','.join('?' * len(self.algorithms))})")
+            params.extend(int(x) for x in self.algorithms)
+        if self.name_pattern is not None:
+            conds.append(f"({prefix}name1 REGEXP ? OR {prefix}name2 REGEXP ?)")
+            params.extend([self.name_pattern, self.name_pattern])
+        return " AND ".join(conds), params
+
+
+def _i2u(addr: int) -> int:
+    """
+    Convert a signed address (as stored in database) into its unsigned value.
+    """
+    return addr & _ADDR_MASK
+
+
+def _unsigned_batches(
+    cursor: sqlite3.Cursor,
+    query: str,
+    addresses: dict[str, int],
+    condition: tuple[str, list] | None = None,
+    size: int = 4096,
+) -> Iterator[list[tuple]]:
+    """
+    Iterate the rows of a query by batches, with the given address columns (stored
+    signed in database) converted to unsigned. Rows whose addresses are all positive,
+    which is the usual case, are selected in SQL and returned as-is. Only the remaining
+    rows get converted.
+
+    :param cursor: sqlite3 cursor to the DB
+    :param query: SELECT query (without WHERE clause)
+    :param addresses: SQL column -> index of the column in the returned rows
+    :param condition: additional SQL condition on rows and its parameters
+    :param size: number of rows per batch
+    """
+    positive = " AND ".join(f"{x} >= 0" for x in addresses)
+    where, params = f"({condition[0]}) AND " if condition else "", condition[1] if condition else []
+    cursor.execute(f"{query} WHERE {where}{positive}", params)
+    while rows := cursor.fetchmany(size):
+        yield rows
+
+    indexes = set(addresses.values())
+    cursor.execute(f"{query} WHERE {where}NOT ({positive})", params)
+    while rows := cursor.fetchmany(size):
+        yield [tuple(x & _ADDR_MASK if i in indexes else x for i, x in enumerate(row)) for row in rows]
+
+
+def _iter_unsigned(
+    cursor: sqlite3.Cursor,
+    query: str,
+    addresses: dict[str, int],
+    condition: tuple[str, list] | None = None,
+) -> Iterator[tuple]:
+    """
+    Iterate the rows of a query, with the given address columns converted to unsigned
+    (see :py:func:`_unsigned_batches`).
+
+    :param cursor: sqlite3 cursor to the DB
+    :param query: SELECT query (without WHERE clause)
+    :param addresses: SQL column -> index of the column in the returned rows
+    :param condition: additional SQL condition on rows and its parameters
+    """
+    for rows in _unsigned_batches(cursor, query, addresses, condition):
+        yield from rows
+
+
+def _produce_rows(
+    file: Union[Path, str],
+    profile: ConnectionProfile | None,
+    query: str,
+    addresses: dict[str, int],
+    condition: tuple[str, list] | None,
+    out: queue.SimpleQueue,
+) -> None:
+    """
+    Read the rows of a query on a dedicated connection and push them by batches
+    in the given queue. The end of the rows is marked with None (or with the
+    exception raised).
+    """
+    try:
+        db = connect(file, "ro", profile)
+        try:
+            for rows in _unsigned_batches(db.cursor(), query, addresses, condition, size=65536):
+                out.put(rows)
+        finally:
+            db.close()
+        out.put(None)
+    except Exception as e:
+        out.put(e)
+
+
+def _build_instruction_index(rows: Iterable[tuple]) -> tuple["MatchIndex", "MatchIndex"]:
+    """
+    Build primary and secondary instruction match indexes from the rows of
+    :py:attr:`BindiffFile._INSTRUCTION_QUERY`.
+    """
+    primary, secondary = MatchIndex(), MatchIndex()
+    for f_addr1, f_addr2, i_addr1, i_addr2 in rows:
+        primary.add(i_addr1, f_addr1, i_addr2)
+        secondary.add(i_addr2, f_addr2, i_addr1)
+    return primary, secondary
+
+
+def _load_instruction_index(
+    file: Union[Path, str],
+    profile: ConnectionProfile | None,
+    query: str,
+    addresses: dict[str, int],
+    condition: tuple[str, list] | None,
+) -> tuple["MatchIndex", "MatchIndex", float]:
+    """
+    Load the instruction match indexes of a file (meant to run in a worker process)
+
+    :return: primary and secondary indexes, and the time it took
+    """
+    start = time.perf_counter()
+    gc.disable()
+    db = connect(file, "ro", profile)
+    try:
+        primary, secondary = _build_instruction_index(
+            _iter_unsigned(db.cursor(), query, addresses, condition)
+        )
+    finally:
+        db.close()
+    return primary, secondary, time.perf_counter() - start
+
+
+def _consume_rows(rows: queue.SimpleQueue) -> Iterator[tuple]:
+    """
+    Iterate the rows pushed by :py:func:`_produce_rows`.
+    """
+    while (batch := rows.get()) is not None:
+        if isinstance(batch, Exception):
+            raise batch
+        yield from batch
+
+
+class MatchIndex(Mapping):
+    """
+    Index of matches by address, then by function address: addr -> fun-addr -> match.
+    As an address (basic block, instruction) usually belongs to a single function,
+    the entry is stored as a flat (fun-addr, match) tuple. A nested dictionary is only
+    created for addresses shared by multiple functions.
+
+    Indexing an address returns a fun-addr -> match dictionary (as a plain nested
+    dict would do). :py:meth:`get_for_function` directly returns the match.
+    """
+
+    __slots__ = ("_index",)
+
+    def __init__(self):
+        self._index: dict[int, tuple | dict] = {}
+
+    def add(self, addr: int, fun_addr: int, match) -> None:
+        """
+        Add a match in the index.
+
+        :param addr: address of the element (basic block, instruction)
+        :param fun_addr: address of the function containing the element
+        :param match: match object
+        """
+        entry = self._index.get(addr)
+        if entry is None or (type(entry) is tuple and entry[0] == fun_addr):
+            self._index[addr] = (fun_addr, match)
+        elif type(entry) is tuple:
+            self._index[addr] = {entry[0]: entry[1], fun_addr: match}
+        else:
+            entry[fun_addr] = match
+
+    def get_for_function(self, addr: int, fun_addr: int, default=None):
+        """
+        Get the match of the element at the given address inside the given function.
+
+        :param addr: address of the element (basic block, instruction)
+        :param fun_addr: address of the function containing the element
+        :param default: value returned if there is no match
+        :return: the match
+        """
+        entry = self._index.get(addr)
+        if entry is None:
+            return default
+        if type(entry) is tuple:
+            return entry[1] if entry[0] == fun_addr else default
+        return entry.get(fun_addr, default)
+
+    def values_flat(self) -> Iterator:
+        """
+        Iterate all the matches of the index.
+        """
+        for entry in self._index.values():
+            if type(entry) is tuple:
+                yield entry[1]
+            else:
+                yield from entry.values()
+
+    def __getitem__(self, addr: int) -> dict:
+        entry = self._index[addr]
+        return {entry[0]: entry[1]} if type(entry) is tuple else entry
+
+    def __contains__(self, addr: object) -> bool:
+        return addr in self._index
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def _u2i(addr: int) -> int:
+    """
+    Convert an unsigned address into the signed representation stored in database.
+    """
+    return addr - (1 << 64) if addr >= (1 << 63) else addr
+
+
+class _SQLiteMatchView(Mapping):
+    """
+    Read-only dict-like view over a match table of the database. Lookups are
+    resolved with indexed point queries instead of materializing the whole
+    table in memory. Results are kept in a bounded LRU cache.
+    """
+
+    def __init__(self, db: sqlite3.Connection, side: int, cache_size: int):
+        """
+        :param db: database connection
+        :param side: 1 for primary, 2 for secondary
+        :param cache_size: maximum number of lookups kept in the LRU cache
+        """
+        assert side in [1, 2]
+        self._db = db
+        self._side = side
+        self._other = 2 if side == 1 else 1
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._query)
+
+    @abc.abstractmethod
+    def _query(self, addr: int):
+        """
+        Get the match(es) of the element at the given address (None if unmatched)
+        """
+        pass
+
+    def __getitem__(self, addr: int):
+        value = self._lookup(addr)
+        if value is None:
+            raise KeyError(addr)
+        return value
+
+    def __contains__(self, addr: object) -> bool:
+        return isinstance(addr, int) and self._lookup(addr) is not None
+
+    def cache_clear(self) -> None:
+        """
+        Empty the LRU cache (to call if the database has been modified)
+        """
+        self._lookup.cache_clear()
+
+
+class SQLiteFunctionMatchView(_SQLiteMatchView):
+    """
+    View equivalent to ``primary_functions_match`` (or secondary), i.e:
+    fun-addr -> FunctionMatch
+    """
+
+    def _query(self, addr: int) -> FunctionMatch | None:
+        query = f"""SELECT id, address1, name1, address2, name2, similarity, confidence, algorithm
+                    FROM function WHERE address{self._side} = ?"""
+        row = self._db.execute(query, (_u2i(addr),)).fetchone()
+        if row is None:
+            return None
+        id, addr1, name1, addr2, name2, sim, conf, alg = row
+        return FunctionMatch(id, _i2u(addr1), name1, _i2u(addr2), name2, sim, conf, FunctionAlgorithm(alg))
+
+    def __iter__(self) -> Iterator[int]:
+        for (addr,) in self._db.execute(f"SELECT address{self._side} FROM function"):
+            yield _i2u(addr)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM function").fetchone()[0]
+
+
+class _SQLiteNestedMatchView(_SQLiteMatchView):
+    """
+    View over a match table indexed by address then function address (same
+    interface than :py:class:`MatchIndex`)
+    """
+
+    def get_for_function(self, addr: int, fun_addr: int, default=None):
+        """
+        Get the match of the element at the given address inside the given function.
+
+        :param addr: address of the element (basic block, instruction)
+        :param fun_addr: address of the function containing the element
+        :param default: value returned if there is no match
+        :return: the match
+        """
+        matches = self._lookup(addr)
+        return default if matches is None else matches.get(fun_addr, default)
+
+    def values_flat(self) -> Iterator:
+        """
+        Iterate all the matches of the view.
+        """
+        for matches in self.values():
+            yield from matches.values()
+
+
+class SQLiteBasicBlockMatchView(_SQLiteNestedMatchView):
+    """
+    View equivalent to ``primary_basicblock_match`` (or secondary), i.e:
+    BB-addr -> fun-addr -> BasicBlockMatch
+    """
+
+    def _query(self, addr: int) -> dict[int, BasicBlockMatch] | None:
+        query = f"""SELECT b.id, b.address1, b.address2, b.algorithm, f.id, f.address1, f.name1, f.address2,
+                           f.name2, f.similarity, f.confidence, f.algorithm
+                    FROM basicblock AS b JOIN function AS f ON f.id = b.functionid
+                    WHERE b.address{self._side} = ?"""
+        matches = {}
+        for bb_id, bb_addr1, bb_addr2, bb_algo, *fun in self._db.execute(query, (_u2i(addr),)):
+            id, addr1, name1, addr2, name2, sim, conf, alg = fun
+            fun_match = FunctionMatch(
+                id, _i2u(addr1), name1, _i2u(addr2), name2, sim, conf, FunctionAlgorithm(alg)
+            )
+            bmatch = BasicBlockMatch(
+                bb_id, fun_match, _i2u(bb_addr1), _i2u(bb_addr2), BasicBlockAlgorithm(bb_algo)
+            )
+            matches[fun_match.address1 if self._side == 1 else fun_match.address2] = bmatch
+        return matches if matches else None
+
+    def __iter__(self) -> Iterator[int]:
+        for (addr,) in self._db.execute(f"SELECT DISTINCT address{self._side} FROM basicblock"):
+            yield _i2u(addr)
+
+    def __len__(self) -> int:
+        query = f"SELECT COUNT(DISTINCT address{self._side}) FROM basicblock"
+        return self._db.execute(query).fetchone()[0]
+
+
+class SQLiteInstructionMatchView(_SQLiteNestedMatchView):
+    """
+    View equivalent to ``primary_instruction_match`` (or secondary), i.e:
+    inst_addr -> match_func_addr -> match_inst_addr
+    """
+
+    def _query(self, addr: int) -> dict[int, int] | None:
+        query = f"""SELECT f.address{self._side}, i.address{self._other}
+                    FROM instruction AS i
+                    JOIN basicblock AS b ON b.id = i.basicblockid
+                    JOIN function AS f ON f.id = b.functionid
+                    WHERE i.address{self._side} = ?"""
+        matches = {_i2u(f_addr): _i2u(i_addr) for f_addr, i_addr in self._db.execute(query, (_u2i(addr),))}
+        return matches if matches else None
+
+    def __iter__(self) -> Iterator[int]:
+        for (addr,) in self._db.execute(f"SELECT DISTINCT address{self._side} FROM instruction"):
+            yield _i2u(addr)
+
+    def __len__(self) -> int:
+        query = f"SELECT COUNT(DISTINCT address{self._side}) FROM instruction"
+        return self._db.execute(query).fetchone()[0]
+
 
 class BindiffFile(object):
     """
@@ -74,17 +511,69 @@ class BindiffFile(object):
     in the database.
     """
 
-    def __init__(self, file: Union[Path, str], permission: str = "ro"):
+    #: Indexes used by the 'sqlite' backend for point lookups (by address, and by parent match)
+    INDEXES = {
+        "bindiff_function_address1": "function(address1)",
+        "bindiff_function_address2": "function(address2)",
+        "bindiff_basicblock_address1": "basicblock(address1)",
+        "bindiff_basicblock_address2": "basicblock(address2)",
+        "bindiff_instruction_address1": "instruction(address1)",
+        "bindiff_instruction_address2": "instruction(address2)",
+        "bindiff_basicblock_functionid": "basicblock(functionid)",
+        "bindiff_instruction_basicblockid": "instruction(basicblockid)",
+    }
+
+    def __init__(
+        self,
+        file: Union[Path, str],
+        permission: str = "ro",
+        lazy: bool = False,
+        backend: str = "memory",
+        cache_size: int = 4096,
+        cache: DiffCache | None = None,
+        profile: ConnectionProfile | None = None,
+        parallel_load: bool = False,
+        load_filter: LoadFilter | None = None,
+        create_indexes: bool = False,
+    ):
         """
         :param file: path to Bindiff database
         :param permission: database permissions (default: ro)
+        :param lazy: if True (and 'ro'), match tables are only loaded on first access
+        :param backend: 'memory' loads matches in dictionaries, 'sqlite' keeps them in
+                        database and answers lookups with point queries (read-only). Without
+                        the lookup indexes (see ``create_indexes``), which the differ does not
+                        create, each lookup scans a whole table.
+        :param cache_size: number of lookups cached by each view of the 'sqlite' backend
+        :param cache: on-disk cache of parsed diffs, used when all tables are loaded at once
+        :param profile: connection settings (e.g: :py:data:`bindiff.connection.READ_PROFILE`)
+        :param parallel_load: read the match tables in parallel, each on its own connection
+                              (the instruction table being loaded in another process)
+        :param load_filter: only load the matches of the selected functions (in-memory backend).
+                            The cache is not used for filtered loads.
+        :param create_indexes: with the 'sqlite' backend, add the lookup indexes to the file if
+                               missing (see :py:meth:`create_indexes`). The file is modified
+                               (it grows and its mtime changes), thus it is opt-in: without
+                               indexes, lookups scan the tables.
         """
         assert permission in ["ro", "rw"]
+        assert backend in ["memory", "sqlite"]
 
         self._file = file
+        self._profile = profile
+        self._backend = backend
+        self._load_filter = load_filter
+        self._bulk = False  # "bulk build" mode (see create)
+        # Incremented each time matches are added with the add_* methods (invalidates derived data).
+        # The match tables must not be modified in place: such edits are not tracked.
+        self._generation = 0
+
+        # Indexes have to exist before opening (the database might be immutable or loaded in memory)
+        if create_indexes and backend == "sqlite" and permission == "ro":
+            self.create_indexes()
 
         # Open database
-        self.db = sqlite3.connect(f"file:{str(file)}?mode={permission}", uri=True)
+        self.db = connect(file, permission, profile)
 
         # fmt: off
         # Global variables
@@ -99,36 +588,238 @@ class BindiffFile(object):
         self.primary_file: File = None    #: Primary file
         self.secondary_file: File = None  #: Secondary file
 
-        # Function matches
-        self.primary_functions_match: dict[
-            int, FunctionMatch
-        ] = {}  #: FunctionMatch indexed by addresses in primary
-        self.secondary_functions_match: dict[
-            int, FunctionMatch
-        ] = {}  #: FunctionMatch indexed by addresses in secondary
-
-        # Basicblock matches:  BB-addr -> fun-addr -> match
-        self.primary_basicblock_match: dict[
-            int, dict[int, BasicBlockMatch]
-        ] = {}  #: Basic block match from primary
-        self.secondary_basicblock_match: dict[
-            int, dict[int, BasicBlockMatch]
-        ] = {}  #: Basic block match from secondary
-
-
-        # Instruction matches
-        # {inst_addr : {match_func_addr : match_inst_addr}}
-        self.primary_instruction_match: dict[int, dict[int, int]] = {}
-        self.secondary_instruction_match: dict[int, dict[int, int]] = {}
+        # Match tables (None means not loaded yet, see the properties below)
+        self._primary_functions_match: dict[int, FunctionMatch] | None = None
+        self._secondary_functions_match: dict[int, FunctionMatch] | None = None
+        self._primary_basicblock_match: MatchIndex | None = None
+        self._secondary_basicblock_match: MatchIndex | None = None
+        self._primary_instruction_match: MatchIndex | None = None
+        self._secondary_instruction_match: MatchIndex | None = None
+
+        # Columnar representation of match tables (loaded on demand, requires numpy)
+        self._function_columns: "FunctionMatchColumns" = None
+        self._basicblock_columns: "BasicBlockMatchColumns" = None
+
+        # Per-match indexes (built on demand)
+        self._function_basicblock_matches: dict[int, list[BasicBlockMatch]] | None = None
+        self._basicblock_instruction_matches: dict[int, list[tuple[int, int]]] | None = None
+        # fmt: on
 
         # If 'ro', load database content
         if permission == "ro":
             self._load_metadata(self.db.cursor())
             self._load_file(self.db.cursor())
+            if backend == "sqlite":
+                self._init_sqlite_views(cache_size)
+            elif not lazy:
+                self._load_all_matches(cache if load_filter is None else None, parallel_load)
+        else:  # Nothing to load, start from empty tables
+            self._primary_functions_match, self._secondary_functions_match = {}, {}
+            self._primary_basicblock_match, self._secondary_basicblock_match = MatchIndex(), MatchIndex()
+            self._primary_instruction_match, self._secondary_instruction_match = MatchIndex(), MatchIndex()
+
+    def _load_all_matches(self, cache: DiffCache | None = None, parallel: bool = False) -> None:
+        """
+        Load all the match tables, from the cache if provided and up-to-date.
+        The garbage collector is paused meanwhile as millions of objects are
+        created, none of them being garbage.
+
+        :param cache: on-disk cache of parsed diffs
+        :param parallel: read the tables in parallel (see :py:meth:`_load_matches_parallel`)
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if cache is not None and (tables := cache.load(self._file)) is not None:
+                (self._primary_functions_match, self._secondary_functions_match,
+                 self._primary_basicblock_match, self._secondary_basicblock_match,
+                 self._primary_instruction_match, self._secondary_instruction_match) = tables  # fmt: skip
+                return
+
+            if parallel:
+                self._load_matches_parallel()
+            else:
+                self._load_function_match(self.db.cursor())
+                self._load_basicblock_match(self.db.cursor())
+                self._load_instruction_match(self.db.cursor())
+
+            if cache is not None:
+                tables = (self._primary_functions_match, self._secondary_functions_match,
+                          self._primary_basicblock_match, self._secondary_basicblock_match,
+                          self._primary_instruction_match, self._secondary_instruction_match)  # fmt: skip
+                cache.store(self._file, tables)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _init_sqlite_views(self, cache_size: int) -> None:
+        """
+        Make the match tables point to database views instead of dictionaries.
+
+        :param cache_size: maximum number of lookups cached by each view
+        """
+        # fmt: off
+        self._primary_functions_match = SQLiteFunctionMatchView(self.db, 1, cache_size)
+        self._secondary_functions_match = SQLiteFunctionMatchView(self.db, 2, cache_size)
+        self._primary_basicblock_match = SQLiteBasicBlockMatchView(self.db, 1, cache_size)
+        self._secondary_basicblock_match = SQLiteBasicBlockMatchView(self.db, 2, cache_size)
+        self._primary_instruction_match = SQLiteInstructionMatchView(self.db, 1, cache_size)
+        self._secondary_instruction_match = SQLiteInstructionMatchView(self.db, 2, cache_size)
+        # fmt: on
+
+    def create_indexes(self) -> None:
+        """
+        Create the indexes used for point lookups (see :py:attr:`INDEXES`) if they
+        do not exist yet. This modifies the file on disk (size and mtime). A temporary
+        writable connection is used (thus changes must have been committed beforehand).
+        If the file is not writable, lookups are still working but without the help of
+        the missing indexes (each of them then scans a whole table).
+        """
+        db = sqlite3.connect(f"file:{str(self._file)}?mode=ro", uri=True)
+        query = "SELECT name FROM sqlite_master WHERE type = 'index'"
+        existing = {x for (x,) in db.execute(query)}
+        db.close()
+        missing = {k: v for k, v in self.INDEXES.items() if k not in existing}
+        if not missing:
+            return
+
+        if not os.access(self._file, os.W_OK):
+            logging.warning(f"cannot create indexes on read-only file {self._file}")
+            return
+
+        db = sqlite3.connect(f"file:{str(self._file)}?mode=rw", uri=True)
+        for name, target in missing.items():
+            db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        db.commit()
+        db.close()
+
+    @property
+    def primary_functions_match(self) -> dict[int, FunctionMatch]:
+        """
+        FunctionMatch indexed by addresses in primary
+        """
+        if self._primary_functions_match is None:
             self._load_function_match(self.db.cursor())
+        return self._primary_functions_match
+
+    @property
+    def secondary_functions_match(self) -> dict[int, FunctionMatch]:
+        """
+        FunctionMatch indexed by addresses in secondary
+        """
+        if self._secondary_functions_match is None:
+            self._load_function_match(self.db.cursor())
+        return self._secondary_functions_match
+
+    @property
+    def primary_basicblock_match(self) -> MatchIndex:
+        """
+        Basic block match from primary: BB-addr -> fun-addr -> match
+        """
+        if self._primary_basicblock_match is None:
             self._load_basicblock_match(self.db.cursor())
+        return self._primary_basicblock_match
+
+    @property
+    def secondary_basicblock_match(self) -> MatchIndex:
+        """
+        Basic block match from secondary: BB-addr -> fun-addr -> match
+        """
+        if self._secondary_basicblock_match is None:
+            self._load_basicblock_match(self.db.cursor())
+        return self._secondary_basicblock_match
+
+    @property
+    def primary_instruction_match(self) -> MatchIndex:
+        """
+        Instruction match from primary: {inst_addr : {match_func_addr : match_inst_addr}}
+        """
+        if self._primary_instruction_match is None:
             self._load_instruction_match(self.db.cursor())
+        return self._primary_instruction_match
 
+    @property
+    def secondary_instruction_match(self) -> MatchIndex:
+        """
+        Instruction match from secondary: {inst_addr : {match_func_addr : match_inst_addr}}
+        """
+        if self._secondary_instruction_match is None:
+            self._load_instruction_match(self.db.cursor())
+        return self._secondary_instruction_match
+
+    @property
+    def function_basicblock_matches(self) -> dict[int, list[BasicBlockMatch]]:
+        """
+        Basic block matches of each function match: {function_match_id : [BasicBlockMatch]}
+        (built on first access from the basic block matches, or from a scan of the table
+        with the 'sqlite' backend). See :py:meth:`basicblock_matches_of` for a single one.
+        """
+        if self._function_basicblock_matches is None:
+            index = {}
+            if self._backend == "sqlite":
+                matches = self.stream_basicblock_matches()
+            else:
+                matches = self.primary_basicblock_match.values_flat()
+            for match in matches:
+                fun_id = match.function_match.id
+                if (bbs := index.get(fun_id)) is None:
+                    index[fun_id] = [match]
+                else:
+                    bbs.append(match)
+            self._function_basicblock_matches = index
+        return self._function_basicblock_matches
+
+    @property
+    def basicblock_instruction_matches(self) -> dict[int, list[tuple[int, int]]]:
+        """
+        Instruction matches of each basic block match: {basicblock_match_id : [(inst_addr1, inst_addr2)]}
+        (built on first access, straight from the database). See :py:meth:`instruction_matches_of`
+        for a single one.
+        """
+        if self._basicblock_instruction_matches is None:
+            index = {}
+            rows = _iter_unsigned(self.db.cursor(), *self._table_query("instruction_basicblock"))
+            for bb_id, addr1, addr2 in rows:
+                if (insts := index.get(bb_id)) is None:
+                    index[bb_id] = [(addr1, addr2)]
+                else:
+                    insts.append((addr1, addr2))
+            self._basicblock_instruction_matches = index
+        return self._basicblock_instruction_matches
+
+    def basicblock_matches_of(self, fun_match: FunctionMatch) -> list[BasicBlockMatch]:
+        """
+        Get the basic block matches of a function match. With the 'sqlite' backend,
+        they are queried in the database (without the index on ``functionid``, see
+        :py:meth:`create_indexes`, the query scans the table). Otherwise they are
+        read from :py:attr:`function_basicblock_matches`.
+
+        :param fun_match: function match
+        :return: list of the basic block matches of the function match
+        """
+        if self._backend != "sqlite":
+            return self.function_basicblock_matches.get(fun_match.id, [])
+        query = "SELECT id, address1, address2, algorithm FROM basicblock WHERE functionid = ?"
+        algos = _BASICBLOCK_ALGORITHMS
+        return [
+            BasicBlockMatch(id, fun_match, _i2u(addr1), _i2u(addr2), algos[alg])
+            for id, addr1, addr2, alg in self.db.execute(query, (fun_match.id,))
+        ]
+
+    def instruction_matches_of(self, bb_match: BasicBlockMatch) -> list[tuple[int, int]]:
+        """
+        Get the instruction matches of a basic block match. With the 'sqlite' backend,
+        they are queried in the database (without the index on ``basicblockid``, see
+        :py:meth:`create_indexes`, the query scans the table). Otherwise they are read
+        from :py:attr:`basicblock_instruction_matches`.
+
+        :param bb_match: basic block match
+        :return: list of the instruction matches (primary address, secondary address)
+        """
+        if self._backend != "sqlite":
+            return self.basicblock_instruction_matches.get(bb_match.id, [])
+        query = "SELECT address1, address2 FROM instruction WHERE basicblockid = ?"
+        return [(_i2u(a1), _i2u(a2)) for a1, a2 in self.db.execute(query, (bb_match.id,))]
 
     @property
     def unmatched_primary_count(self) -> int:
@@ -156,6 +847,7 @@ class BindiffFile(object):
     def function_matches(self) -> list[FunctionMatch]:
         """
         Returns the list of matched functions
+        (see :py:meth:`stream_function_matches` to iterate them without loading them)
         """
         return list(self.primary_functions_match.values())
 
@@ -163,10 +855,76 @@ class BindiffFile(object):
     def basicblock_matches(self) -> list[BasicBlockMatch]:
         """
         Returns the list of matched basic blocks in primary (and secondary)
+        (see :py:meth:`stream_basicblock_matches` to iterate them without loading them)
         """
-        return [
-            x for bb_matches in self.primary_basicblock_match.values() for x in bb_matches.values()
-        ]
+        return list(self.primary_basicblock_match.values_flat())
+
+    @property
+    def function_columns(self) -> "FunctionMatchColumns":
+        """
+        Columnar (NumPy) representation of function matches, loaded on first
+        access straight from the database. Requires numpy.
+        """
+        if self._function_columns is None:
+            from bindiff.columnar import FunctionMatchColumns
+
+            self._function_columns = FunctionMatchColumns.from_cursor(self.db.cursor())
+        return self._function_columns
+
+    @property
+    def basicblock_columns(self) -> "BasicBlockMatchColumns":
+        """
+        Columnar (NumPy) representation of basic block matches, loaded on first
+        access straight from the database. Requires numpy.
+        """
+        if self._basicblock_columns is None:
+            from bindiff.columnar import BasicBlockMatchColumns
+
+            self._basicblock_columns = BasicBlockMatchColumns.from_cursor(self.db.cursor())
+            self._basicblock_columns.functions = self.function_columns
+        return self._basicblock_columns
+
+    def stream_function_matches(self) -> Iterator[FunctionMatch]:
+        """
+        Iterate the function matches as they are read from the database, without
+        loading the match tables (constant memory). The load filter applies.
+
+        :return: iterator of FunctionMatch objects
+        """
+        algos = _FUNCTION_ALGORITHMS
+        for id, addr1, name1, addr2, name2, sim, conf, alg in _iter_unsigned(
+            self.db.cursor(), *self._table_query("function")
+        ):
+            yield FunctionMatch(id, addr1, name1, addr2, name2, sim, conf, algos[alg])
+
+    def stream_basicblock_matches(self) -> Iterator[BasicBlockMatch]:
+        """
+        Iterate the basic block matches as they are read from the database, without
+        loading the match tables (constant memory). Each basic block row is joined
+        with its function match in SQL. The load filter applies.
+
+        :return: iterator of BasicBlockMatch objects
+        """
+        f_algos, bb_algos = _FUNCTION_ALGORITHMS, _BASICBLOCK_ALGORITHMS
+        fun_match = None
+        for id, bb_addr1, bb_addr2, bb_algo, *fun in _iter_unsigned(
+            self.db.cursor(), *self._table_query("basicblock_function")
+        ):
+            # Rows are mostly grouped by function, share the FunctionMatch object between them
+            if fun_match is None or fun_match.id != fun[0]:
+                fun_id, addr1, name1, addr2, name2, sim, conf, alg = fun
+                fun_match = FunctionMatch(fun_id, addr1, name1, addr2, name2, sim, conf, f_algos[alg])
+            yield BasicBlockMatch(id, fun_match, bb_addr1, bb_addr2, bb_algos[bb_algo])
+
+    def stream_instruction_matches(self) -> Iterator[tuple[int, int, int, int]]:
+        """
+        Iterate the instruction matches as they are read from the database, without
+        loading the match tables (constant memory). The load filter applies.
+
+        :return: iterator of tuples (primary function address, secondary function address,
+                 primary instruction address, secondary instruction address)
+        """
+        return _iter_unsigned(self.db.cursor(), *self._table_query("instruction"))
 
     def _load_file(self, cursor: sqlite3.Cursor) -> None:
         """
@@ -195,19 +953,72 @@ class BindiffFile(object):
         self.similarity = float("{0:.3f}".format(self.similarity))  # round the value to 3 decimals
         self.confidence = float("{0:.3f}".format(self.confidence))  # round the value to 3 decimals
 
+    # Queries of the match tables and the position of addresses in rows
+    # fmt: off
+    _FUNCTION_QUERY = ("SELECT id, address1, name1, address2, name2, similarity, confidence, algorithm FROM function",
+                       {"address1": 1, "address2": 3})
+    _BASICBLOCK_QUERY = ("SELECT id, functionid, address1, address2, algorithm FROM basicblock",
+                         {"address1": 2, "address2": 3})
+    _BASICBLOCK_FUNCTION_QUERY = ("""SELECT b.id, b.address1, b.address2, b.algorithm, f.id, f.address1, f.name1,
+                                    f.address2, f.name2, f.similarity, f.confidence, f.algorithm
+                                    FROM basicblock AS b JOIN function AS f ON f.id = b.functionid""",
+                                  {"b.address1": 1, "b.address2": 2, "f.address1": 5, "f.address2": 7})
+    _INSTRUCTION_QUERY = ("""SELECT f.address1, f.address2, i.address1, i.address2 FROM instruction AS i
+                             JOIN basicblock AS b ON b.id = i.basicblockid
+                             JOIN function AS f ON f.id = b.functionid""",
+                          {"f.address1": 0, "f.address2": 1, "i.address1": 2, "i.address2": 3})
+    _INSTRUCTION_BASICBLOCK_QUERY = ("SELECT basicblockid, address1, address2 FROM instruction",
+                                     {"address1": 1, "address2": 2})
+    # fmt: on
+
+    def _table_query(self, table: str) -> tuple[str, dict[str, int], tuple[str, list] | None]:
+        """
+        Get the query of a match table with the load filter pushed down.
+
+        :param table: 'function', 'basicblock', 'basicblock_function' (basic blocks joined
+                      with their function), 'instruction' or 'instruction_basicblock'
+                      (instructions with their basic block id)
+        :return: query, address columns and SQL condition (with its parameters)
+        """
+        # fmt: off
+        query, addresses = {"function": self._FUNCTION_QUERY, "basicblock": self._BASICBLOCK_QUERY,
+                            "basicblock_function": self._BASICBLOCK_FUNCTION_QUERY,
+                            "instruction": self._INSTRUCTION_QUERY,
+                            "instruction_basicblock": self._INSTRUCTION_BASICBLOCK_QUERY}[table]
+        # fmt: on
+        if self._load_filter is None:
+            return query, addresses, None
+
+        # The selection of functions is evaluated once by SQLite, then used as a set of ids
+        cond, params = self._load_filter.sql()
+        if table == "basicblock":
+            cond = f"functionid IN (SELECT id FROM function WHERE {cond})"
+        elif table in ["basicblock_function", "instruction"]:
+            cond = f"b.functionid IN (SELECT id FROM function WHERE {cond})"
+        elif table == "instruction_basicblock":
+            cond = (f"basicblockid IN (SELECT id FROM basicblock WHERE "
+                    f"functionid IN (SELECT id FROM function WHERE {cond}))")  # fmt: skip
+        return query, addresses, (cond, params)
+
     def _load_function_match(self, cursor: sqlite3.Cursor) -> None:
         """
         Load matched functions stored in a DB file
 
         :param cursor: sqlite3 cursor to the DB
         """
-        i2u = lambda x: ctypes.c_ulonglong(x).value
-        fun_query = "SELECT id, address1, name1, address2, name2, similarity, confidence, algorithm FROM function"
-        for id, addr1, name1, addr2, name2, sim, conf, alg in cursor.execute(fun_query):
-            addr1, addr2 = i2u(addr1), i2u(addr2)
-            m = FunctionMatch(id, addr1, name1, addr2, name2, sim, conf, FunctionAlgorithm(alg))
-            self.primary_functions_match[addr1] = m
-            self.secondary_functions_match[addr2] = m
+        self._build_function_match(_iter_unsigned(cursor, *self._table_query("function")))
+
+    def _build_function_match(self, rows: Iterable[tuple]) -> None:
+        """
+        Build function matches from the rows of :py:attr:`_FUNCTION_QUERY`
+        """
+        algos = _FUNCTION_ALGORITHMS
+        primary, secondary = {}, {}
+        for id, addr1, name1, addr2, name2, sim, conf, alg in rows:
+            m = FunctionMatch(id, addr1, name1, addr2, name2, sim, conf, algos[alg])
+            primary[addr1] = m
+            secondary[addr2] = m
+        self._primary_functions_match, self._secondary_functions_match = primary, secondary
 
     def _load_basicblock_match(self, cursor: sqlite3.Cursor) -> None:
         """
@@ -215,49 +1026,79 @@ class BindiffFile(object):
 
         :param cursor: sqlite3 cursor to the DB
         """
+        self._build_basicblock_match(_iter_unsigned(cursor, *self._table_query("basicblock")))
+
+    def _build_basicblock_match(self, rows: Iterable[tuple]) -> None:
+        """
+        Build basic block matches from the rows of :py:attr:`_BASICBLOCK_QUERY`
+        (function matches are loaded first if needed)
+        """
+        algos = _BASICBLOCK_ALGORITHMS
         mapping = {x.id: x for x in self.function_matches}
-        query = "SELECT id, functionid, address1, address2, algorithm FROM basicblock"
-        for id, fun_id, bb_addr1, bb_addr2, bb_algo in cursor.execute(query):
+        primary, secondary = MatchIndex(), MatchIndex()
+        for id, fun_id, bb_addr1, bb_addr2, bb_algo in rows:
             fun_match = mapping[fun_id]
-            assert fun_id == mapping[fun_id].id
-            bmatch = BasicBlockMatch(
-                id, fun_match, bb_addr1, bb_addr2, BasicBlockAlgorithm(bb_algo)
-            )
+            bmatch = BasicBlockMatch(id, fun_match, bb_addr1, bb_addr2, algos[bb_algo])
 
-            # As a basic block address can be in multiple functions create a nested dictionnary
-            if bb_addr1 in self.primary_basicblock_match:
-                self.primary_basicblock_match[bb_addr1][fun_match.address1] = bmatch
-            else:
-                self.primary_basicblock_match[bb_addr1] = {fun_match.address1: bmatch}
-
-            if bb_addr2 in self.secondary_basicblock_match:
-                self.secondary_basicblock_match[bb_addr2][fun_match.address2] = bmatch
-            else:
-                self.secondary_basicblock_match[bb_addr2] = {fun_match.address2: bmatch}
+            # As a basic block address can be in multiple functions index it with the function
+            primary.add(bb_addr1, fun_match.address1, bmatch)
+            secondary.add(bb_addr2, fun_match.address2, bmatch)
+        self._primary_basicblock_match, self._secondary_basicblock_match = primary, secondary
 
     def _load_instruction_match(self, cursor: sqlite3.Cursor) -> None:
         """
-        Load matched instructions stored in a DB file
+        Load matched instructions stored in a DB file.
+        Instructions are joined with their function match in SQL, thus neither basic
+        block matches nor function matches have to be loaded beforehand.
 
         :param cursor: sqlite3 cursor to the DB
         """
-        i2u = lambda x: ctypes.c_ulonglong(x).value
-        mapping = {x.id: x for x in self.basicblock_matches}
-        query = "SELECT basicblockid, address1, address2 FROM instruction"
-        for id, i_addr1, i_addr2 in cursor.execute(query):
-            i_addr1, i_addr2 = i2u(i_addr1), i2u(i_addr2)
-            fun_match = mapping[id].function_match
+        self._build_instruction_match(_iter_unsigned(cursor, *self._table_query("instruction")))
 
-            # Set mapping for instructions
-            if i_addr1 in self.primary_instruction_match:
-                self.primary_instruction_match[i_addr1][fun_match.address1] = i_addr2
-            else:
-                self.primary_instruction_match[i_addr1] = {fun_match.address1: i_addr2}
+    def _build_instruction_match(self, rows: Iterable[tuple]) -> None:
+        """
+        Build instruction matches from the rows of :py:attr:`_INSTRUCTION_QUERY`
+        """
+        self._primary_instruction_match, self._secondary_instruction_match = _build_instruction_index(rows)
 
-            if i_addr2 in self.secondary_instruction_match:
-                self.secondary_instruction_match[i_addr2][fun_match.address2] = i_addr1
-            else:
-                self.secondary_instruction_match[i_addr2] = {fun_match.address2: i_addr1}
+    def _load_matches_parallel(self) -> None:
+        """
+        Load all the match tables in parallel. Function and basic block tables
+        are read on their own connection and thread while their rows are assembled
+        by the calling thread. The instruction table, the largest one, is loaded
+        in a separate process.
+        """
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            # fmt: off
+            instructions = pool.submit(_load_instruction_index, self._file, self._profile,
+                                       *self._table_query("instruction"))
+            # fmt: on
+
+            readers = []
+            for table in ["function", "basicblock"]:
+                rows = queue.SimpleQueue()
+                args = (self._file, self._profile, *self._table_query(table), rows)
+                t = threading.Thread(target=_produce_rows, args=args, daemon=True)
+                t.start()
+                readers.append((t, rows))
+
+            tables_time = 0.0
+            for (t, rows), build in zip(readers, [self._build_function_match, self._build_basicblock_match]):
+                t_start = time.perf_counter()
+                build(_consume_rows(rows))
+                t.join()
+                tables_time += time.perf_counter() - t_start
+
+            primary, secondary, elapsed = instructions.result()
+            self._primary_instruction_match, self._secondary_instruction_match = primary, secondary
+            tables_time += elapsed
+
+        total = time.perf_counter() - start
+        logging.debug(
+            f"parallel load of {self._file}: {total:.2f}s (tables: {tables_time:.2f}s, "
+            f"speedup: x{tables_time / total:.2f})"
+        )
 
     @staticmethod
     def init_database(db: sqlite3.Connection) -> None:
@@ -301,6 +1142,7 @@ class BindiffFile(object):
         desc: str,
         similarity: float,
         confidence: float,
+        bulk: bool = False,
     ) -> "BindiffFile":
         """
         Create a new Bindiff database object in the file given in `filename`.
@@ -311,6 +1153,8 @@ class BindiffFile(object):
         :param desc: description of the database
         :param similarity: similarity score between to two binaries
         :param confidence: confidence of results
+        :param bulk: "bulk build" mode, journaling and disk synchronization are disabled
+                     until the next :py:meth:`commit` (the file is corrupted on crash)
         :return: instance of BindiffFile (ready to be filled)
         """
         open(filename, "w").close()
@@ -355,7 +1199,69 @@ class BindiffFile(object):
 
         db.commit()
         db.close()
-        return BindiffFile(filename, permission="rw")
+        diff = BindiffFile(filename, permission="rw")
+        if bulk:
+            diff.db.execute("PRAGMA journal_mode = OFF")
+            diff.db.execute("PRAGMA synchronous = OFF")
+            diff._bulk = True
+        return diff
+
+    @staticmethod
+    def create_from_matches(
+        filename: str,
+        version: str,
+        desc: str,
+        similarity: float,
+        confidence: float,
+        matches: Iterable[tuple],
+        batch_size: int = 100000,
+    ) -> "BindiffFile":
+        """
+        Create a new Bindiff database filled with function, basic block and instruction
+        matches in a single call (using the bulk build mode).
+        Each function match is a tuple
+        ``(fun_addr1, fun_addr2, fun_name1, fun_name2, similarity, confidence, basic_blocks)``
+        where ``basic_blocks`` is an iterable of ``(bb_addr1, bb_addr2, instructions)`` and
+        ``instructions`` an iterable of ``(inst_addr1, inst_addr2)``.
+
+        :param filename: database file path
+        :param version: version of the differ used
+        :param desc: description of the database
+        :param similarity: similarity score between to two binaries
+        :param confidence: confidence of results
+        :param matches: function matches (with their basic blocks and instructions)
+        :param batch_size: number of rows inserted at once
+        :return: instance of BindiffFile (committed, files can still be added)
+        """
+        diff = BindiffFile.create(filename, version, desc, similarity, confidence, bulk=True)
+        funs, bbs, insts = [], [], []
+
+        def flush(force: bool = False) -> None:
+            if funs and (force or len(funs) >= batch_size):
+                diff.add_function_matches(funs)
+                funs.clear()
+            if bbs and (force or len(bbs) >= batch_size):
+                diff.add_basic_block_matches(bbs)
+                bbs.clear()
+            if insts and (force or len(insts) >= batch_size):
+                diff.add_instruction_matches(insts)
+                insts.clear()
+
+        # Ids are assigned here, thus rows can be inserted by batches in any order
+        fun_id, bb_id = diff._next_id("function"), diff._next_id("basicblock")
+        for addr1, addr2, name1, name2, sim, conf, basic_blocks in matches:
+            identical_bbs = 0
+            for bb_addr1, bb_addr2, instructions in basic_blocks:
+                bbs.append((fun_id, bb_addr1, bb_addr2, bb_id))
+                insts.extend((bb_id, i1, i2) for i1, i2 in instructions)
+                bb_id += 1
+                identical_bbs += 1
+            funs.append((addr1, addr2, name1, name2, sim, conf, identical_bbs, fun_id))
+            fun_id += 1
+            flush()
+        flush(force=True)
+        diff.commit()
+        return diff
 
     def add_file_matched(self,
                          export_name: str,
@@ -441,6 +1347,7 @@ class BindiffFile(object):
         :param identical_bbs: number of identical basic blocks
         :return: id of the row inserted in database.
         """
+        self._matches_changed("function")
         cursor = self.db.cursor()
         cursor.execute(
             """
@@ -483,6 +1390,7 @@ class BindiffFile(object):
         :param bb_addr2: basic block address in secondary
         :return: id of the row inserted in database.
         """
+        self._matches_changed("basicblock")
         cursor = self.db.cursor()
 
         cursor.execute(
@@ -508,6 +1416,7 @@ class BindiffFile(object):
         :param inst_addr1: instruction address in primary
         :param inst_addr2: instruction address in secondary
         """
+        self._matches_changed("instruction")
         cursor = self.db.cursor()
 
         cursor.execute(
@@ -521,6 +1430,122 @@ class BindiffFile(object):
             },
         )
 
+    def _matches_changed(self, table: str) -> None:
+        """
+        Invalidate the in-memory match tables and the data derived from them, as
+        a table is about to be modified in database. Tables are loaded again from
+        the database (thus with the new rows) on their next access. Basic block
+        matches refer to function matches, thus they are reloaded with them.
+
+        :param table: 'function', 'basicblock' or 'instruction'
+        """
+        self._generation += 1
+        if not isinstance(self._primary_functions_match, _SQLiteMatchView):
+            if table == "function":
+                self._primary_functions_match, self._secondary_functions_match = None, None
+            if table in ["function", "basicblock"]:
+                self._primary_basicblock_match, self._secondary_basicblock_match = None, None
+            if table == "instruction":
+                self._primary_instruction_match, self._secondary_instruction_match = None, None
+        self._function_basicblock_matches = None
+        self._basicblock_instruction_matches = None
+
+    def _next_id(self, table: str) -> int:
+        """
+        :param table: table name
+        :return: the first id available in the table
+        """
+        return self.db.execute(f"SELECT IFNULL(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    @staticmethod
+    def _rows(rows: Iterable) -> Iterable:
+        """
+        Accept arrays (e.g. numpy) as well as iterables of tuples
+        """
+        return rows.tolist() if hasattr(rows, "tolist") else rows
+
+    def add_function_matches(
+        self, matches: Iterable[tuple], algorithm: FunctionAlgorithm = FunctionAlgorithm.manual
+    ) -> list[int]:
+        """
+        Add function matches in database (bulk version of :py:meth:`add_function_match`).
+        Each match is a tuple ``(fun_addr1, fun_addr2, fun_name1, fun_name2, similarity,
+        confidence, identical_bbs)``, confidence and identical_bbs being optional.
+        A row id can also be given as an 8th element.
+
+        :param matches: iterable of function matches
+        :param algorithm: algorithm recorded for all the matches
+        :return: ids of the rows inserted in database (in the same order)
+        """
+        self._matches_changed("function")
+        next_id = self._next_id("function")
+        rows, ids = [], []
+        for match in matches:
+            addr1, addr2, name1, name2, sim = match[:5]
+            conf = match[5] if len(match) > 5 else 0.0
+            same_bbs = match[6] if len(match) > 6 else 0
+            id = match[7] if len(match) > 7 else None
+            if id is None:
+                id, next_id = next_id, next_id + 1
+            rows.append((id, _u2i(addr1), _u2i(addr2), name1, name2, sim, conf, same_bbs))
+            ids.append(id)
+
+        self.db.executemany(
+            """
+            INSERT INTO function (id, address1, address2, name1, name2, similarity, confidence, flags,
+                                  algorithm, evaluate, commentsported, basicblocks, edges, instructions)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, 0, 0, ?, 0, 0)
+            """,
+            [(*row[:7], int(algorithm), row[7]) for row in rows],
+        )
+        return ids
+
+    def add_basic_block_matches(
+        self,
+        matches: Iterable[tuple],
+        algorithm: BasicBlockAlgorithm = BasicBlockAlgorithm.edges_prime_product,
+    ) -> list[int]:
+        """
+        Add basic block matches in database (bulk version of :py:meth:`add_basic_block_match`).
+        Each match is a tuple ``(funentry_id, bb_addr1, bb_addr2)``. A row id can also be given
+        as a 4th element.
+
+        :param matches: iterable (or array) of basic block matches
+        :param algorithm: algorithm recorded for all the matches
+        :return: ids of the rows inserted in database (in the same order)
+        """
+        self._matches_changed("basicblock")
+        next_id = self._next_id("basicblock")
+        rows, ids = [], []
+        for match in self._rows(matches):
+            fun_id, addr1, addr2, id = (*match, None)[:4]
+            if id is None:
+                id, next_id = next_id, next_id + 1
+            rows.append((id, fun_id, _u2i(addr1), _u2i(addr2)))
+            ids.append(id)
+
+        self.db.executemany(
+            """
+            INSERT INTO basicblock (id, functionid, address1, address2, algorithm, evaluate)
+            VALUES (?, ?, ?, ?, ?, 0)
+            """,
+            [(*row, int(algorithm)) for row in rows],
+        )
+        return ids
+
+    def add_instruction_matches(self, matches: Iterable[tuple[int, int, int]]) -> None:
+        """
+        Add instruction matches in database (bulk version of :py:meth:`add_instruction_match`).
+        Each match is a tuple ``(basicblock_id, inst_addr1, inst_addr2)``.
+
+        :param matches: iterable (or array) of instruction matches
+        """
+        self._matches_changed("instruction")
+        self.db.executemany(
+            "INSERT INTO instruction (basicblockid, address1, address2) VALUES (?, ?, ?)",
+            ((entry, _u2i(addr1), _u2i(addr2)) for entry, addr1, addr2 in self._rows(matches)),
+        )
+
     def update_file_infos(
         self, entry_id: int, fun_count: int, lib_count: int, bb_count: int, inst_count: int
     ) -> None:
@@ -594,8 +1619,13 @@ class BindiffFile(object):
     def commit(self) -> None:
         """
         Commit all pending transaction in the database.
+        It ends the "bulk build" mode (if enabled) by restoring a safe journaling.
         """
         self.db.commit()
+        if self._bulk:
+            self.db.execute("PRAGMA journal_mode = DELETE")
+            self.db.execute("PRAGMA synchronous = FULL")
+            self._bulk = False
 
     def close(self) -> None:
         """
@@ -0,0 +1,136 @@
+from pathlib import Path
+import sqlite3
+import time
+from typing import Union
+
+from bindiff.batch import DiffJob, DiffResult
+from bindiff.cache import file_digest
+
+
+class DiffJournal(object):
+    """
+    Journal of a batch of diffs (SQLite database). The status of each pair, the
+    hashes of its inputs and the state of its output are recorded as results
+    arrive, so that an interrupted batch can be resumed: pairs whose output is
+    still valid are skipped, failed or missing ones are run again.
+
+    Inputs are identified by the .BinExport files diffed (binaries being exported
+    next to them), thus a pair is run again if one of its exports changed.
+    """
+
+    def __init__(self, file: Union[Path, str]):
+        """
+        :param file: path of the journal (created if it does not exist)
+        """
+        self._file = Path(file)
+        self.db = sqlite3.connect(str(self._file))
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (output TEXT PRIMARY KEY, primary_file TEXT,
+                secondary_file TEXT, primary_hash TEXT, secondary_hash TEXT, status TEXT, error TEXT,
+                duration REAL, output_size INTEGER, output_mtime INTEGER, timestamp REAL)"""
+        )
+        self.db.execute("""CREATE TABLE IF NOT EXISTS digests (path TEXT PRIMARY KEY, size INTEGER,
+                mtime INTEGER, sha256 TEXT)""")
+        self.db.commit()
+
+    @staticmethod
+    def _export_file(program: Path) -> Path:
+        return program if program.suffix == ".BinExport" else Path(str(program) + ".BinExport")
+
+    def digest(self, file: Path) -> str | None:
+        """
+        Get the SHA256 of a file, only hashing it again if its size or
+        modification time changed.
+
+        :param file: file path
+        :return: hex digest, or None if the file does not exist
+        """
+        try:
+            st = file.stat()
+        except FileNotFoundError:
+            return None
+        path = str(file.resolve())
+        row = self.db.execute(
+            "SELECT size, mtime, sha256 FROM digests WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[:2] == (st.st_size, st.st_mtime_ns):
+            return row[2]
+        digest = file_digest(file)
+        self.db.execute(
+            "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, digest),
+        )
+        return digest
+
+    def is_done(self, job: DiffJob) -> bool:
+        """
+        Whether a job succeeded and its output is still valid: the output file has
+        not been modified and the .BinExport files of both programs are unchanged.
+
+        :param job: diff job
+        :return: True if the job can be skipped
+        """
+        row = self.db.execute(
+            "SELECT status, primary_hash, secondary_hash, output_size, output_mtime "
+            "FROM jobs WHERE output = ?",
+            (str(job.output.resolve()),),
+        ).fetchone()
+        if row is None or row[0] != "ok":
+            return False
+        try:
+            st = job.output.stat()
+        except FileNotFoundError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != row[3:5]:
+            return False
+        return (
+            self.digest(self._export_file(job.primary)) == row[1]
+            and self.digest(self._export_file(job.secondary)) == row[2]
+        )
+
+    def record(self, result: DiffResult) -> None:
+        """
+        Record the result of a job (committed right away)
+
+        :param result: result of the job
+        """
+        job = result.job
+        size, mtime = None, None
+        if result.success:
+            st = job.output.stat()
+            size, mtime = st.st_size, st.st_mtime_ns
+        self.db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(job.output.resolve()),
+                str(job.primary),
+                str(job.secondary),
+                self.digest(self._export_file(job.primary)),
+                self.digest(self._export_file(job.secondary)),
+                "ok" if result.success else "failed",
+                result.error,
+                result.duration,
+                size,
+                mtime,
+                time.time(),
+            ),
+        )
+        self.db.commit()
+
+    def durations(self) -> dict[Path, float]:
+        """
+        Durations of the jobs that succeeded (e.g. to schedule the longest ones
+        first, see :py:func:`bindiff.batch.sort_by_cost`). Failed jobs are left
+        out, as they might have stopped early (crash, timeout, interruption).
+
+        :return: duration in seconds, by output path
+        """
+        query = "SELECT output, duration FROM jobs WHERE status = 'ok'"
+        return {Path(out): duration for out, duration in self.db.execute(query)}
+
+    def close(self) -> None:
+        """
+        Close the journal.
+        """
+        self.db.commit()
+        self.db.close()
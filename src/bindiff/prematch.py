@@ -0,0 +1,296 @@
+from pathlib import Path
+import hashlib
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Union, Callable
+
+from binexport import ProgramBinExport
+from binexport.types import FunctionType
+
+from bindiff.file import BindiffFile
+from bindiff.types import FunctionAlgorithm, BasicBlockAlgorithm
+
+#: Version recorded in the diff files written by the pre-matcher
+PREMATCH_VERSION = "python-bindiff prematch"
+
+#: Prefixes of the names given automatically by disassemblers (not used to match functions)
+AUTO_NAME_PREFIXES = ("sub_", "nullsub_", "j_sub_", "FUN_", "thunk_FUN_", "unknown_")
+
+
+class _Block(object):
+    """
+    Basic block of the flat view of a program
+    """
+
+    __slots__ = ("addr", "bytes", "instructions")
+
+    def __init__(self, addr: int, data: bytes, instructions: list[int]):
+        self.addr = addr
+        self.bytes = data  # bytes of all the instructions
+        self.instructions = instructions  # instruction addresses
+
+
+class _Function(object):
+    """
+    Function of the flat view of a program, with its hashes
+    """
+
+    __slots__ = ("addr", "name", "library", "blocks", "bytes_hash", "prime_hash")
+
+    def __init__(
+        self, addr: int, name: str, library: bool, blocks: list[_Block], mnemonics: list[str]
+    ):
+        self.addr = addr
+        self.name = name
+        self.library = library
+        self.blocks = sorted(blocks, key=lambda x: x.addr)
+        h = hashlib.sha1()
+        for bb in self.blocks:
+            h.update(len(bb.bytes).to_bytes(4, "little"))
+            h.update(bb.bytes)
+        self.bytes_hash = h.digest()
+        # Equivalent of BinDiff prime signature: the multiset of mnemonics
+        self.prime_hash = hashlib.sha1("\n".join(sorted(mnemonics)).encode()).digest()
+
+    @property
+    def instruction_count(self) -> int:
+        return sum(len(x.instructions) for x in self.blocks)
+
+
+def _index_program(program: ProgramBinExport) -> dict[int, _Function]:
+    """
+    Build a flat view of the functions of a program straight from its protobuf.
+    Instructions are processed in batch: their addresses, bytes and mnemonics
+    are computed in a single pass, basic blocks are then slices of these arrays.
+
+    :param program: program to index
+    :return: function address -> function (imported functions are ignored)
+    """
+    pb = program.proto
+    mnemonic_names = [x.name for x in pb.mnemonic]
+    instructions = list(pb.instruction)  # message wrappers are only created once
+    raw = [x.raw_bytes for x in instructions]
+    mnemonics = [mnemonic_names[x.mnemonic_index] for x in instructions]
+    # Addresses are only stored when an instruction does not follow the previous one
+    addrs = []
+    next_addr = 0
+    for inst, data in zip(instructions, raw):
+        addr = inst.address if inst.HasField("address") else next_addr
+        addrs.append(addr)
+        next_addr = addr + len(data)
+
+    # Instruction ranges of each basic block (end_index is 0 for a single instruction)
+    ranges = [
+        [(x.begin_index, x.end_index or x.begin_index + 1) for x in bb.instruction_index]
+        for bb in pb.basic_block
+    ]
+
+    functions = {}
+    for pb_fun in pb.flow_graph:
+        blocks, fun_mnemonics = [], []
+        for bb_index in pb_fun.basic_block_index:
+            bb_ranges = ranges[bb_index]
+            if len(bb_ranges) == 1:
+                begin, end = bb_ranges[0]
+                blocks.append(_Block(addrs[begin], b"".join(raw[begin:end]), addrs[begin:end]))
+                fun_mnemonics += mnemonics[begin:end]
+            else:
+                idx = [i for begin, end in bb_ranges for i in range(begin, end)]
+                blocks.append(
+                    _Block(addrs[idx[0]], b"".join(raw[i] for i in idx), [addrs[i] for i in idx])
+                )
+                fun_mnemonics += [mnemonics[i] for i in idx]
+
+        addr = addrs[ranges[pb_fun.entry_basic_block_index][0][0]]
+        fun = program.get(addr)
+        name = fun.name if fun is not None else ""
+        library = fun is not None and fun.type == FunctionType.LIBRARY
+        functions[addr] = _Function(addr, name, library, blocks, fun_mnemonics)
+    return functions
+
+
+def _unique_pairs(
+    funs1: dict[int, _Function], funs2: dict[int, _Function], key: Callable[[_Function], object]
+) -> list[tuple[_Function, _Function]]:
+    """
+    Pair the functions whose key is unique in both programs (None keys are ignored)
+    """
+    groups1, groups2 = defaultdict(list), defaultdict(list)
+    for funs, groups in [(funs1, groups1), (funs2, groups2)]:
+        for fun in funs.values():
+            if (k := key(fun)) is not None:
+                groups[k].append(fun)
+    pairs = []
+    for k, group1 in groups1.items():
+        group2 = groups2.get(k)
+        if len(group1) == 1 and group2 is not None and len(group2) == 1:
+            pairs.append((group1[0], group2[0]))
+    return pairs
+
+
+def _match_blocks(fun1: _Function, fun2: _Function) -> list[tuple[_Block, _Block]]:
+    """
+    Match the identical basic blocks of two functions. The blocks of identical
+    functions are paired in order, otherwise only the blocks whose bytes are
+    unique in both functions are matched.
+    """
+    if fun1.bytes_hash == fun2.bytes_hash and len(fun1.blocks) == len(fun2.blocks):
+        return list(zip(fun1.blocks, fun2.blocks))
+
+    blocks1, blocks2 = defaultdict(list), defaultdict(list)
+    for bb in fun1.blocks:
+        blocks1[bb.bytes].append(bb)
+    for bb in fun2.blocks:
+        blocks2[bb.bytes].append(bb)
+    pairs = []
+    for data, group1 in blocks1.items():
+        group2 = blocks2.get(data)
+        if len(group1) == 1 and group2 is not None and len(group2) == 1:
+            pairs.append((group1[0], group2[0]))
+    return pairs
+
+
+@dataclass
+class PrematchResult:
+    """
+    Outcome of the pre-matching of two programs
+    """
+
+    diff_file: Path  #: diff file written
+    matched: int  #: number of function matches
+    primary_functions: int  #: number of functions in primary (imports excluded)
+    secondary_functions: int  #: number of functions in secondary (imports excluded)
+    threshold: float  #: maximum ratio of unmatched functions to consider the diff complete
+
+    @property
+    def primary_unmatched(self) -> int:
+        return self.primary_functions - self.matched
+
+    @property
+    def secondary_unmatched(self) -> int:
+        return self.secondary_functions - self.matched
+
+    @property
+    def unmatched_ratio(self) -> float:
+        """
+        Largest ratio of unmatched functions of the two programs
+        """
+        return max(
+            self.primary_unmatched / max(self.primary_functions, 1),
+            self.secondary_unmatched / max(self.secondary_functions, 1),
+        )
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether the unmatched functions are few enough to skip the differ
+        """
+        return self.unmatched_ratio <= self.threshold
+
+
+def prematch(
+    primary: Union[ProgramBinExport, Path, str],
+    secondary: Union[ProgramBinExport, Path, str],
+    out_diff: Union[Path, str],
+    threshold: float = 0.01,
+) -> PrematchResult:
+    """
+    Match the identical functions of two programs in-process and write the result
+    as a .BinDiff file, without running the differ. Functions are matched, in this
+    order, on:
+
+    * their bytes (``hash_matching``)
+    * their name, when not given automatically (``name_hash_matching``)
+    * the multiset of their mnemonics (``prime_signature_matching``)
+
+    a key being only used when it is unique in both programs. The identical basic
+    blocks of matched functions are matched, and so are their instructions. It is
+    meant for patch-level diffs (e.g: successive builds), where most functions are
+    unchanged: the result tells whether the remaining unmatched functions are few
+    enough to skip the differ.
+
+    :param primary: primary program (object or .BinExport path)
+    :param secondary: secondary program (object or .BinExport path)
+    :param out_diff: diff file to write
+    :param threshold: maximum ratio of unmatched functions to consider the diff complete
+    :return: the pre-matching result
+    """
+    p1 = primary if isinstance(primary, ProgramBinExport) else ProgramBinExport(primary)
+    p2 = secondary if isinstance(secondary, ProgramBinExport) else ProgramBinExport(secondary)
+    funs1, funs2 = _index_program(p1), _index_program(p2)
+    n1, n2 = len(funs1), len(funs2)
+
+    # Match functions, removing them from the pools after each algorithm
+    pool1, pool2 = dict(funs1), dict(funs2)
+    matches: list[tuple[FunctionAlgorithm, _Function, _Function]] = []
+    keys = [
+        (FunctionAlgorithm.hash_matching, lambda f: f.bytes_hash),
+        (
+            FunctionAlgorithm.name_hash_matching,
+            lambda f: None if not f.name or f.name.startswith(AUTO_NAME_PREFIXES) else f.name,
+        ),
+        (FunctionAlgorithm.prime_signature_matching, lambda f: f.prime_hash),
+    ]
+    for algo, key in keys:
+        for fun1, fun2 in _unique_pairs(pool1, pool2, key):
+            matches.append((algo, fun1, fun2))
+            del pool1[fun1.addr], pool2[fun2.addr]
+
+    similarity = 2 * len(matches) / max(n1 + n2, 1)
+    diff = BindiffFile.create(str(out_diff), PREMATCH_VERSION, "", similarity, 1.0, bulk=True)
+    for program, funs in [(p1, funs1), (p2, funs2)]:
+        meta = program.proto.meta_information
+        libs = [f for f in funs.values() if f.library]
+        diff.add_file_matched(
+            program.path.name,
+            meta.executable_id,
+            meta.executable_name,
+            functions=len(funs) - len(libs),
+            libfunctions=len(libs),
+            basicblocks=sum(len(f.blocks) for f in funs.values() if not f.library),
+            libbasicblocks=sum(len(f.blocks) for f in libs),
+            instructions=sum(f.instruction_count for f in funs.values() if not f.library),
+            libinstructions=sum(f.instruction_count for f in libs),
+        )
+
+    # Function, then basic block rows are inserted by algorithm (the ids of the parent rows are needed)
+    bb_rows = defaultdict(list)  # algorithm -> (function id, bb1, bb2)
+    bb_instructions = defaultdict(list)  # algorithm -> instruction pairs of each bb row
+    for algo in dict.fromkeys(x[0] for x in matches):
+        group = [(f1, f2, _match_blocks(f1, f2)) for a, f1, f2 in matches if a == algo]
+        rows = []
+        for f1, f2, bbs in group:
+            sim = 2 * len(bbs) / max(len(f1.blocks) + len(f2.blocks), 1)
+            rows.append((f1.addr, f2.addr, f1.name, f2.name, sim, 1.0, len(bbs)))
+        for fun_id, (f1, f2, bbs) in zip(diff.add_function_matches(rows, algo), group):
+            for bb1, bb2 in bbs:
+                n = len(bb1.instructions)
+                bb_algo = (
+                    BasicBlockAlgorithm.hash_matching_four_inst_min
+                    if n >= 4
+                    else BasicBlockAlgorithm.prime_matching_no_inst_min
+                )
+                bb_rows[bb_algo].append((fun_id, bb1.addr, bb2.addr))
+                bb_instructions[bb_algo].append(zip(bb1.instructions, bb2.instructions))
+
+    for bb_algo, rows in bb_rows.items():
+        ids = diff.add_basic_block_matches(rows, bb_algo)
+        diff.add_instruction_matches(
+            (bb_id, i1, i2)
+            for bb_id, insts in zip(ids, bb_instructions[bb_algo])
+            for i1, i2 in insts
+        )
+    diff.commit()
+    diff.close()
+
+    from bindiff.bindiff import BinDiff
+
+    BinDiff._fix_up_filename(p1.path, p2.path, Path(out_diff))
+
+    result = PrematchResult(Path(out_diff), len(matches), n1, n2, threshold)
+    logging.debug(
+        f"prematch {p1.path.name} vs {p2.path.name}: {len(matches)} matches, "
+        f"unmatched: {result.primary_unmatched}/{result.secondary_unmatched}"
+    )
+    return result
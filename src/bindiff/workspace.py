@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from typing import Union
 import ctypes
 
+from bindiff.connection import ConnectionProfile, connect
+
 
 @dataclass
 class Diffs:
@@ -22,10 +24,13 @@ class BindiffWorkspace(object):
     to open bindiff workspace.
     """
 
-    def __init__(self, file: Union[Path, str], permission: str = "ro"):
+    def __init__(
+        self, file: Union[Path, str], permission: str = "ro", profile: ConnectionProfile | None = None
+    ):
         """
         :param file: path to Bindiff database
         :param permission: database permissions (default: ro)
+        :param profile: connection settings used when opening an existing workspace
         """
         assert permission in ["ro", "rw"]
 
@@ -33,7 +38,7 @@ class BindiffWorkspace(object):
 
         if self._file.exists():
             # Open database
-            self.db = sqlite3.connect(f"file:{str(self._file)}?mode={permission}", uri=True)
+            self.db = connect(self._file, permission, profile)
         else:
             # Create database
             self.db = sqlite3.connect(str(self._file))